@@ -6,25 +6,31 @@ Provides HTTP endpoints for the recruitment pipeline
 
 import json
 import asyncio
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Literal, Optional
 from datetime import datetime
 from pydantic import BaseModel, Field
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from main import SourcingAgent
 from config import get_config
+from job_queue import JobQueue
+from scheduler import BatchScheduler
 
 # Global agent instance
 sourcing_agent = None
+job_queue = None
 
 # Pydantic models for request/response
 class JobRequest(BaseModel):
     job_description: str = Field(..., description="Job description to search candidates for")
     top_candidates: int = Field(default=10, ge=1, le=50, description="Number of top candidates to return")
     use_cache: bool = Field(default=True, description="Whether to use cached results if available")
+    mode: Optional[Literal["standard", "cascade", "fast"]] = Field(
+        default=None, description="Scoring mode: standard, cascade or fast (local heuristic, no scoring LLM calls)"
+    )
 
 class CandidateResponse(BaseModel):
     name: str
@@ -44,16 +50,40 @@ class SourcingResponse(BaseModel):
     processing_time: float
     timestamp: str
     from_cache: bool = False
+    cache_match: Optional[Dict[str, Any]] = None
+    scoring_mode: Optional[str] = None
+    prefilter: Optional[Dict[str, Any]] = None
 
 class ErrorResponse(BaseModel):
     error: str
     timestamp: str
     details: Optional[str] = None
 
+class RerankRequest(BaseModel):
+    job_description: str = Field(..., description="Job description of a stored result")
+    weights: Dict[str, float] = Field(
+        default_factory=dict, description="Rubric weights to change, e.g. {\"experience_match\": 0.5}; others keep SCORING_RUBRIC"
+    )
+    top_candidates: int = Field(default=10, ge=1, le=1000, description="Number of top candidates to return")
+    mode: Optional[Literal["standard", "cascade", "fast"]] = Field(
+        default=None, description="Scoring mode the stored result was produced with"
+    )
+
 class BatchJobRequest(BaseModel):
     job_descriptions: list
     top_candidates: int = 10
     use_cache: bool = True
+    mode: Optional[Literal["standard", "cascade", "fast"]] = None
+
+def _run_queued_job(payload: Dict[str, Any], progress) -> Dict[str, Any]:
+    """Job queue runner: one sourcing pipeline run on a worker thread"""
+    return sourcing_agent.run_pipeline(
+        payload["job_description"],
+        use_cache=payload["use_cache"],
+        top_candidates=payload["top_candidates"],
+        progress=progress,
+        scoring_mode=payload.get("mode")
+    )
 
 # Startup/shutdown events using lifespan
 from contextlib import asynccontextmanager
@@ -61,16 +91,33 @@ from contextlib import asynccontextmanager
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    global sourcing_agent
+    global sourcing_agent, job_queue
     try:
         sourcing_agent = SourcingAgent()
         print("✅ Sourcing Agent initialized successfully")
     except Exception as e:
         print(f"❌ Failed to initialize Sourcing Agent: {e}")
         raise
+    
+    config = get_config()
+    job_queue = JobQueue(
+        config["job_queue_file"],
+        _run_queued_job,
+        workers=config["job_workers"],
+        lease_seconds=config["job_lease_seconds"],
+        max_attempts=config["job_max_attempts"],
+        retention_seconds=config["job_retention_hours"] * 3600
+    )
+    job_queue.start()
+    sourcing_agent.cache_compactor.add(job_queue)
     yield
     # Shutdown
     print("🔄 Shutting down Sourcing Agent...")
+    if job_queue:
+        job_queue.stop()
+    if sourcing_agent:
+        await sourcing_agent.groq_client.aclose()
+        sourcing_agent.close()
 
 # Initialize FastAPI app with lifespan
 app = FastAPI(
@@ -106,7 +153,8 @@ async def root():
             "match": "POST /match - Complete candidate sourcing pipeline",
             "search": "POST /search - Search candidates only",
             "score": "POST /score - Score candidates only",
-            "messages": "POST /messages - Generate messages only"
+            "messages": "POST /messages - Generate messages only",
+            "rerank": "POST /rerank - Re-rank a stored result under new rubric weights (no LLM calls)"
         }
     }
 
@@ -140,7 +188,8 @@ async def match_candidates(request: JobRequest) -> SourcingResponse:
         result = await sourcing_agent.run_pipeline_async(
             job_description=request.job_description,
             use_cache=request.use_cache,
-            top_candidates=request.top_candidates
+            top_candidates=request.top_candidates,
+            scoring_mode=request.mode
         )
         
         # Check for errors in result
@@ -164,10 +213,13 @@ async def search_candidates_only(request: JobRequest):
     
     try:
         # Extract job requirements
-        job_requirements = sourcing_agent.groq_client.extract_job_requirements(request.job_description)
+        job_requirements = await sourcing_agent.groq_client.aextract_job_requirements(request.job_description)
         
-        # Search for candidates
-        candidates = sourcing_agent.searcher.search_candidates(
+        # Search for candidates (blocking I/O, kept off the event loop)
+        loop = asyncio.get_running_loop()
+        candidates = await loop.run_in_executor(
+            None,
+            sourcing_agent.searcher.search_candidates,
             request.job_description, 
             job_requirements or {}
         )
@@ -194,7 +246,7 @@ async def score_candidates_only(job_description: str, candidates: List[Dict[str,
         raise HTTPException(status_code=503, detail="Sourcing agent not initialized")
     
     try:
-        scored_candidates = sourcing_agent.scorer.score_candidates_batch(
+        scored_candidates = await sourcing_agent.scorer.score_candidates_async(
             job_description, 
             candidates
         )
@@ -209,6 +261,36 @@ async def score_candidates_only(job_description: str, candidates: List[Dict[str,
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Re-rank endpoint
+@app.post("/rerank")
+async def rerank_candidates(request: RerankRequest):
+    """
+    Re-rank every candidate scored for a stored result under new rubric weights
+    No LLM calls: fit scores are recomputed from the stored score breakdowns
+    """
+    if not sourcing_agent:
+        raise HTTPException(status_code=503, detail="Sourcing agent not initialized")
+    
+    try:
+        # Loading stored scores is blocking I/O, kept off the event loop
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            None,
+            sourcing_agent.rerank,
+            request.job_description,
+            request.weights,
+            request.top_candidates,
+            request.mode
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    if 'error' in result:
+        raise HTTPException(status_code=404, detail=result['error'])
+    return result
+
 # Generate messages endpoint
 @app.post("/messages")
 async def generate_messages_only(job_description: str, candidates: List[Dict[str, Any]]):
@@ -219,7 +301,7 @@ async def generate_messages_only(job_description: str, candidates: List[Dict[str
         raise HTTPException(status_code=503, detail="Sourcing agent not initialized")
     
     try:
-        candidates_with_messages = sourcing_agent.message_generator.generate_messages_batch(
+        candidates_with_messages = await sourcing_agent.message_generator.agenerate_messages_batch(
             job_description, 
             candidates
         )
@@ -241,13 +323,33 @@ async def cache_status():
     if not sourcing_agent:
         raise HTTPException(status_code=503, detail="Sourcing agent not initialized")
     
+    # Cache and job queue stats are SQLite reads, so they run off the event loop
+    return await asyncio.to_thread(_cache_status)
+
+def _cache_status() -> Dict[str, Any]:
+    """Cache and job queue statistics (blocking)"""
     cache_size = len(sourcing_agent.cache)
-    cache_keys = list(sourcing_agent.cache.keys())
+    cache_keys = sourcing_agent.cache.keys(limit=5)
+    
+    response_cache = sourcing_agent.groq_client.response_cache
+    profile_cache = sourcing_agent.searcher.profile_cache
+    search_cache = sourcing_agent.searcher.search_cache
     
     return {
         "cache_size": cache_size,
         "cache_file": sourcing_agent.cache_file,
-        "recent_jobs": cache_keys[:5] if cache_keys else [],
+        "recent_jobs": cache_keys,
+        "result_cache": sourcing_agent.cache.get_stats(),
+        "jd_index": sourcing_agent.jd_index.get_stats() if sourcing_agent.jd_index else None,
+        "in_flight_pipelines": sourcing_agent.in_flight.get_stats(),
+        "job_queue": job_queue.get_stats() if job_queue else None,
+        "compactor": {
+            "runs": sourcing_agent.cache_compactor.runs,
+            "purged": sourcing_agent.cache_compactor.purged
+        },
+        "llm_cache": response_cache.get_stats() if response_cache else None,
+        "profile_cache": profile_cache.get_stats() if profile_cache else None,
+        "search_cache": search_cache.get_stats() if search_cache else None,
         "timestamp": datetime.now().isoformat()
     }
 
@@ -257,7 +359,7 @@ async def clear_cache():
     if not sourcing_agent:
         raise HTTPException(status_code=503, detail="Sourcing agent not initialized")
     
-    sourcing_agent.clear_cache()
+    await asyncio.to_thread(sourcing_agent.clear_cache)
     
     return {
         "message": "Cache cleared successfully",
@@ -277,6 +379,10 @@ async def get_configuration():
         "timeout_seconds": config["timeout_seconds"],
         "max_retries": config["max_retries"],
         "scoring_rubric": config["scoring_rubric"],
+        "scoring_mode": config["scoring_mode"],
+        "prefilter_enabled": config["prefilter_enabled"],
+        "prefilter_method": config["prefilter_method"],
+        "prefilter_top_k": config["prefilter_top_k"],
         "cache_expiry_hours": config["cache_expiry_hours"],
         "api_host": config["api_host"],
         "api_port": config["api_port"],
@@ -288,29 +394,58 @@ async def get_configuration():
     
     return safe_config
 
-# Background task for async processing
-@app.post("/match/async")
-async def match_candidates_async(request: JobRequest, background_tasks: BackgroundTasks):
+# Background job queue for long-running sourcing jobs
+@app.post("/match/async", status_code=202)
+async def match_candidates_async(request: JobRequest):
     """
-    Async version of candidate matching
-    Returns immediately with a task ID for status checking
+    Queue a sourcing job and return immediately with its ID
+    Poll /jobs/{job_id} for progress and fetch /jobs/{job_id}/result when completed
     """
-    if not sourcing_agent:
+    if not sourcing_agent or not job_queue:
         raise HTTPException(status_code=503, detail="Sourcing agent not initialized")
     
-    task_id = f"task_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
-    
-    # In a production environment, you'd use a proper task queue like Celery
-    # For now, we'll return the task_id and suggest checking back
+    job_id = await asyncio.to_thread(job_queue.submit, {
+        "job_description": request.job_description,
+        "top_candidates": request.top_candidates,
+        "use_cache": request.use_cache,
+        "mode": request.mode
+    })
     
     return {
-        "task_id": task_id,
-        "status": "processing",
-        "message": "Job submitted for processing. Check back in a few minutes.",
-        "estimated_completion": "2-5 minutes",
+        "task_id": job_id,
+        "status": "queued",
+        "status_url": f"/jobs/{job_id}",
+        "result_url": f"/jobs/{job_id}/result",
         "timestamp": datetime.now().isoformat()
     }
 
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    """Get the status and progress of a queued sourcing job"""
+    if not job_queue:
+        raise HTTPException(status_code=503, detail="Job queue not initialized")
+    
+    job = await asyncio.to_thread(job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+@app.get("/jobs/{job_id}/result", response_model=SourcingResponse)
+async def job_result(job_id: str) -> SourcingResponse:
+    """Get the result of a completed sourcing job"""
+    if not job_queue:
+        raise HTTPException(status_code=503, detail="Job queue not initialized")
+    
+    job = await asyncio.to_thread(job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    if job["status"] == "failed":
+        raise HTTPException(status_code=400, detail=job["error"])
+    if job["status"] != "completed":
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is {job['status']}")
+    
+    return SourcingResponse(**await asyncio.to_thread(job_queue.get_result, job_id))
+
 # Error handlers
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
@@ -356,6 +491,23 @@ if __name__ == "__main__":
         workers=1
     )
 
+def _synapse_format(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Format a pipeline result as required by Synapse"""
+    return {
+        "job_id": result['job_description'][:40].replace(' ', '-').lower(),
+        "candidates_found": result['total_candidates_found'],
+        "top_candidates": [
+            {
+                "name": c.get('name', ''),
+                "linkedin_url": c.get('linkedin_url', c.get('url', '')),
+                "fit_score": c.get('fit_score', 0),
+                "score_breakdown": c.get('score_breakdown', {}),
+                "outreach_message": c.get('message', '')
+            }
+            for c in result['top_candidates']
+        ]
+    }
+
 @app.post("/huggingface")
 async def huggingface_endpoint(request: JobRequest):
     """
@@ -367,61 +519,46 @@ async def huggingface_endpoint(request: JobRequest):
         result = await sourcing_agent.run_pipeline_async(
             job_description=request.job_description,
             use_cache=request.use_cache,
-            top_candidates=10
+            top_candidates=10,
+            scoring_mode=request.mode
         )
         if 'error' in result:
             raise HTTPException(status_code=400, detail=result['error'])
-        # Format output as required by Synapse
-        output = {
-            "job_id": request.job_description[:40].replace(' ', '-').lower(),
-            "candidates_found": result['total_candidates_found'],
-            "top_candidates": []
-        }
-        for c in result['top_candidates']:
-            output['top_candidates'].append({
-                "name": c.get('name', ''),
-                "linkedin_url": c.get('linkedin_url', c.get('url', '')),
-                "fit_score": c.get('fit_score', 0),
-                "score_breakdown": c.get('score_breakdown', {}),
-                "outreach_message": c.get('message', '')
-            })
-        return output
+        return _synapse_format(result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/batch")
 async def batch_jobs(request: BatchJobRequest):
     """
-    Batch endpoint: process multiple jobs in parallel and return results in Synapse format
+    Batch endpoint: process multiple jobs concurrently and stream each Synapse-format result
+    as one NDJSON line as soon as that job completes. Lines carry the job's index in the request.
     """
     if not sourcing_agent:
         raise HTTPException(status_code=503, detail="Sourcing agent not initialized")
-    try:
-        results = sourcing_agent.run_batch_jobs(
-            job_descriptions=request.job_descriptions,
-            use_cache=request.use_cache,
-            top_candidates=request.top_candidates
+    
+    config = get_config()
+    # Jobs share one pool of LLM slots and the agent's profile fetch pool
+    scheduler = BatchScheduler(
+        sourcing_agent,
+        max_concurrent_jobs=config["batch_max_concurrent_jobs"],
+        llm_concurrency=config["batch_llm_concurrency"]
+    )
+    
+    async def stream_results():
+        # Closing this generator (client went away) stops waiting on unfinished jobs;
+        # their pipelines run on and still cache their results
+        results = scheduler.iter_results(
+            request.job_descriptions, request.use_cache, request.top_candidates, scoring_mode=request.mode
         )
-        # Format output for each job
-        output = []
-        for result in results:
-            if 'error' in result:
-                output.append({'error': result['error'], 'job_description': result.get('job_description', '')})
-                continue
-            job_out = {
-                "job_id": result['job_description'][:40].replace(' ', '-').lower(),
-                "candidates_found": result['total_candidates_found'],
-                "top_candidates": []
-            }
-            for c in result['top_candidates']:
-                job_out['top_candidates'].append({
-                    "name": c.get('name', ''),
-                    "linkedin_url": c.get('linkedin_url', c.get('url', '')),
-                    "fit_score": c.get('fit_score', 0),
-                    "score_breakdown": c.get('score_breakdown', {}),
-                    "outreach_message": c.get('message', '')
-                })
-            output.append(job_out)
-        return output
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        try:
+            async for index, result in results:
+                if 'error' in result:
+                    line = {'index': index, 'error': result['error'], 'job_description': request.job_descriptions[index]}
+                else:
+                    line = {'index': index, **_synapse_format(result)}
+                yield json.dumps(line, default=str) + "\n"
+        finally:
+            await results.aclose()
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Offline benchmarks for the AI Sourcing Agent
+Runs without API keys or network access
+"""
+
+import sys
+import time
+import random
+from typing import List
+
+from config import get_config
+from cache_store import SQLiteCache
+from search import ProfileURLIndex
+from heuristic_score import HeuristicScorer
+from prefilter import PREFILTER_METHODS, prefilter_candidates
+
+def _make_result_set(unique_profiles: int, variants_per_profile: int, seed: int = 42) -> List[str]:
+    """Synthetic provider results where each profile appears under several URL variants"""
+    rng = random.Random(seed)
+    templates = [
+        "https://www.linkedin.com/in/{id}",
+        "https://linkedin.com/in/{id}/",
+        "https://uk.linkedin.com/in/{id}?trk=public_profile",
+        "https://www.linkedin.com/in/{ID}",
+        "/url?q=https://in.linkedin.com/in/{id}%3Ftrk%3Dserp&sa=U",
+        "https%3A%2F%2Fde.linkedin.com%2Fin%2F{id}%2F",
+    ]
+    urls = []
+    for i in range(unique_profiles):
+        profile_id = f"candidate-{i}-{rng.randint(1000, 9999)}"
+        for template in rng.sample(templates, min(variants_per_profile, len(templates))):
+            urls.append(template.format(id=profile_id, ID=profile_id.upper()))
+    rng.shuffle(urls)
+    return urls
+
+def _dedup_list(urls: List[str]) -> List[str]:
+    """The original approach: exact-string membership test on a list"""
+    result = []
+    for url in urls:
+        if 'linkedin.com/in/' in url and url not in result:
+            result.append(url)
+    return result
+
+def _dedup_index(urls: List[str]) -> List[str]:
+    """Canonicalize and deduplicate through a hashed seen-set"""
+    index = ProfileURLIndex()
+    for url in urls:
+        index.add(url)
+    return index.urls
+
+def benchmark_url_dedup(sizes: List[int] = (200, 2000, 5000), variants: int = 4):
+    """Compare list-based dedup with the canonical hashed index on growing result sets"""
+    print("URL dedup benchmark")
+    print("=" * 78)
+    print(f"{'profiles':>9} {'urls':>8} | {'list uniques':>12} {'list ms':>10} | {'index uniques':>13} {'index ms':>10}")
+    print("-" * 78)
+
+    for size in sizes:
+        urls = _make_result_set(size, variants)
+
+        start = time.perf_counter()
+        list_result = _dedup_list(urls)
+        list_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        index_result = _dedup_index(urls)
+        index_ms = (time.perf_counter() - start) * 1000
+
+        print(f"{size:>9} {len(urls):>8} | {len(list_result):>12} {list_ms:>10.1f} | {len(index_result):>13} {index_ms:>10.1f}")
+
+    print()
+
+BENCHMARK_JOB = """Senior Machine Learning Engineer at Windsurf (Codeium).
+Location: Mountain View, CA. 5+ years of experience with Python, PyTorch and large language models.
+Experience with distributed training, CUDA and production ML systems preferred. MS or PhD in Computer Science."""
+
+BENCHMARK_REQUIREMENTS = {
+    "job_title": "Senior Machine Learning Engineer",
+    "required_skills": ["python", "pytorch", "machine learning", "large language models"],
+    "preferred_skills": ["distributed training", "cuda", "kubernetes"],
+    "experience_years": 5,
+    "location": "Mountain View, CA",
+}
+
+def _make_profiles(count: int, seed: int = 7) -> List[dict]:
+    """Synthetic extracted profiles with a mix of relevant and irrelevant backgrounds"""
+    rng = random.Random(seed)
+    titles = ["Software Engineer", "Senior ML Engineer", "Staff Engineer", "Data Analyst",
+              "Research Scientist", "Marketing Manager", "Principal Engineer", "Junior Developer"]
+    skills = ["python", "pytorch", "machine learning", "large language models", "distributed training",
+              "cuda", "kubernetes", "java", "react", "sql", "excel", "seo", "go", "tableau"]
+    companies = ["Google", "Meta", "a fintech startup", "Acme Corp", "OpenAI", "a retail chain", "NVIDIA"]
+    schools = ["Stanford University", "a state university", "MIT", "IIT Bombay", "a community college"]
+    degrees = ["BS", "MS", "PhD", "Bachelor's degree", "Master's degree"]
+    filler = ["built", "shipped", "led", "the", "platform", "team", "for", "customers", "and", "scaled",
+              "services", "with", "improving", "latency", "reliability", "across", "products"]
+    locations = ["Mountain View, CA", "San Francisco, CA", "Austin, TX", "London, UK", "Remote", "Bangalore, India"]
+
+    required = set(BENCHMARK_REQUIREMENTS["required_skills"])
+    preferred = set(BENCHMARK_REQUIREMENTS["preferred_skills"])
+
+    profiles = []
+    for i in range(count):
+        picked = rng.sample(skills, rng.randint(2, 7))
+        profiles.append({
+            # Ground truth for the synthetic recall benchmark
+            "relevance": 2 * len(required & set(picked)) + len(preferred & set(picked)) + rng.random(),
+            "name": f"Candidate {i}",
+            "linkedin_url": f"https://www.linkedin.com/in/candidate-{i}",
+            "headline": f"{rng.choice(titles)} at {rng.choice(companies)}",
+            "profile_text": (
+                f"{rng.choice(titles)} at {rng.choice(companies)} with {rng.randint(1, 15)} years of experience. "
+                f"Skills: {', '.join(picked)}. {rng.choice(degrees)} from {rng.choice(schools)}. "
+                f"Based in {rng.choice(locations)}. " + " ".join(rng.choice(filler) for _ in range(80))
+            ),
+            "snippet": f"Works on {picked[0]}",
+        })
+    return profiles
+
+def benchmark_heuristic_scorer(sizes: List[int] = (50, 500, 5000)):
+    """Per-candidate cost of the local heuristic scorer used by mode=fast and as the LLM fallback"""
+    print("Heuristic scorer benchmark")
+    print("=" * 60)
+    print(f"{'candidates':>10} | {'total ms':>10} {'us/candidate':>13} | {'top score':>9}")
+    print("-" * 60)
+
+    scorer = HeuristicScorer()
+    for size in sizes:
+        profiles = _make_profiles(size)
+        start = time.perf_counter()
+        scored = scorer.score_candidates(BENCHMARK_JOB, profiles, BENCHMARK_REQUIREMENTS)
+        total_ms = (time.perf_counter() - start) * 1000
+        top = max(candidate["fit_score"] for candidate in scored)
+        print(f"{size:>10} | {total_ms:>10.1f} {total_ms * 1000 / size:>13.1f} | {top:>9}")
+
+    print()
+
+def _recall(reference: List[dict], kept: List[dict], top_n: int) -> float:
+    """Share of the reference ranking's top N that survived the prefilter"""
+    wanted = {candidate.get("linkedin_url") for candidate in reference[:top_n]}
+    return len(wanted & {candidate.get("linkedin_url") for candidate in kept}) / len(wanted)
+
+def _llm_scored(candidates: List[dict]) -> List[dict]:
+    """Candidates whose fit_score came from the LLM, ranked by it (heuristic fallbacks dropped)"""
+    real = [c for c in candidates if not c.get("error") and c.get("scored_by") != "heuristic"]
+    return sorted(real, key=lambda c: c.get("fit_score", 0), reverse=True)
+
+def _stored_llm_rankings() -> List[tuple]:
+    """(job description, requirements, candidates ranked by LLM fit_score) of cached runs that scored everyone.
+
+    Candidates come from the run's 'scored' checkpoint, or from the cached
+    result itself when it holds every scored candidate.
+    """
+    config = get_config()
+    ttl = config["cache_expiry_hours"] * 3600
+    results = SQLiteCache(config["cache_file"], "results", ttl_seconds=ttl)
+    checkpoints = SQLiteCache(config["cache_file"], "checkpoints", ttl_seconds=ttl, compress=True)
+
+    runs = []
+    for key in results.keys():
+        result = results.get(key)
+        # Prefiltered and fast-mode runs never saw an LLM score for every candidate
+        if not result or result.get("prefilter") or result.get("scoring_mode") == "fast":
+            continue
+        scored = checkpoints.get(SQLiteCache.make_key(key, "scored", ""))
+        if not scored and len(result.get("top_candidates", [])) >= result.get("total_candidates_scored", 0):
+            scored = result.get("top_candidates")
+        ranked = _llm_scored(scored or [])
+        if ranked:
+            runs.append((result["job_description"], result.get("job_requirements"), ranked))
+    return runs
+
+def benchmark_prefilter_recall(top_n: int = 10, keep_sizes: List[int] = (10, 20, 40)):
+    """Recall of the LLM top N after lexical prefiltering, per method and prefilter size.
+
+    The reference is the full LLM ranking of cached runs made with the
+    prefilter off (PREFILTER_ENABLED=false). Without any, synthetic profiles
+    with a hand-made relevance stand in; that number only checks the ranking
+    code and says nothing about recall of the LLM top N.
+    """
+    print("Prefilter recall benchmark")
+    print("=" * 81)
+
+    runs = _stored_llm_rankings()
+    recall_label = f"recall@{top_n}"
+    if runs:
+        print(f"Reference: full LLM ranking of {len(runs)} cached runs")
+    else:
+        print("Reference: no fully LLM-scored runs cached, using synthetic profiles with known relevance")
+        print("NOTE: synthetic recall is NOT recall of the LLM ranking. Run the pipeline with "
+              "PREFILTER_ENABLED=false and use_cache on to record LLM references.")
+        recall_label = f"syn.recall@{top_n}"
+        runs = []
+        for seed in range(5):
+            profiles = _make_profiles(200, seed=seed)
+            runs.append((BENCHMARK_JOB, BENCHMARK_REQUIREMENTS,
+                         sorted(profiles, key=lambda c: c["relevance"], reverse=True)))
+
+    print(f"{'method':>10} {'keep':>6} | {'runs':>5} {'avg candidates':>15} | {recall_label:>13} {'LLM calls saved':>16} {'ms/run':>8}")
+    print("-" * 81)
+    for method in PREFILTER_METHODS:
+        for keep in keep_sizes:
+            eligible = [run for run in runs if len(run[2]) > keep]
+            if not eligible:
+                continue
+            recalls, saved, elapsed = [], [], 0.0
+            for job_description, requirements, ranked in eligible:
+                # The prefilter sees profiles in search order, not ranked
+                shuffled = random.Random(0).sample(ranked, len(ranked))
+                start = time.perf_counter()
+                kept = prefilter_candidates(job_description, shuffled, keep, requirements, method)
+                elapsed += time.perf_counter() - start
+                recalls.append(_recall(ranked, kept, min(top_n, keep)))
+                saved.append(1 - len(kept) / len(ranked))
+            average_candidates = sum(len(run[2]) for run in eligible) / len(eligible)
+            print(f"{method:>10} {keep:>6} | {len(eligible):>5} {average_candidates:>15.0f} | "
+                  f"{sum(recalls) / len(recalls):>13.2f} {sum(saved) / len(saved):>15.0%} "
+                  f"{elapsed * 1000 / len(eligible):>8.1f}")
+
+    print()
+
+BENCHMARKS = {
+    "dedup": benchmark_url_dedup,
+    "heuristic": benchmark_heuristic_scorer,
+    "prefilter": benchmark_prefilter_recall,
+}
+
+def main():
+    """Run the named benchmarks (all by default)"""
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark: {name}. Available: {', '.join(BENCHMARKS)}")
+            sys.exit(1)
+        BENCHMARKS[name]()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,569 @@
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+class SQLiteCache:
+    """Persistent key/value cache backed by SQLite.
+
+    Entries expire after a TTL, and once the table grows past ``max_entries``
+    or ``max_bytes`` the least recently used entries are evicted. The entry
+    count and byte total are kept as running totals, loaded when the table
+    is opened and resynced whenever expired entries are purged (writers in
+    other processes make them drift in between), so writes never scan the
+    table. The database
+    runs in WAL mode with one connection per thread, so it can be shared by
+    worker threads and by several processes pointing at the same file.
+    """
+
+    def __init__(self, db_path: str, table: str, ttl_seconds: float,
+                 max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+                 compress: bool = False):
+        """Initialize the cache; the table is created on first use"""
+        if not table.isidentifier():
+            raise ValueError(f"Invalid cache table name: {table}")
+
+        self.db_path = db_path
+        self.table = table
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.compress = compress
+
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Running COUNT(*) and SUM(size) of the table, guarded by _stats_lock
+        self._count = 0
+        self._bytes = 0
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Build a content-addressed key from JSON-serializable parts"""
+        payload = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, creating the table if needed"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+
+        if not self._schema_ready:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    conn.execute(f"""
+                        CREATE TABLE IF NOT EXISTS {self.table} (
+                            key TEXT PRIMARY KEY,
+                            value BLOB NOT NULL,
+                            size INTEGER NOT NULL,
+                            created_at REAL NOT NULL,
+                            expires_at REAL NOT NULL,
+                            last_access REAL NOT NULL
+                        )""")
+                    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.table}_expires ON {self.table} (expires_at)")
+                    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.table}_access ON {self.table} (last_access)")
+                    self._load_totals(conn)
+                    self._schema_ready = True
+        return conn
+
+    def _encode(self, value: Any) -> bytes:
+        data = json.dumps(value, default=str).encode()
+        return zlib.compress(data) if self.compress else data
+
+    def _decode(self, data: bytes) -> Any:
+        if self.compress:
+            data = zlib.decompress(data)
+        return json.loads(data)
+
+    def _load_totals(self, conn: sqlite3.Connection):
+        """Set the running entry count and byte total from the table (one full scan)"""
+        count, total_bytes = conn.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}"
+        ).fetchone()
+        with self._stats_lock:
+            self._count, self._bytes = count, total_bytes
+
+    def _adjust_totals(self, entries: int, size_bytes: int):
+        with self._stats_lock:
+            self._count = max(0, self._count + entries)
+            self._bytes = max(0, self._bytes + size_bytes)
+
+    def _record(self, hit: bool):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the cached value for key, or default when missing or expired"""
+        try:
+            conn = self._connect()
+            now = time.time()
+            row = conn.execute(
+                f"SELECT value FROM {self.table} WHERE key = ? AND expires_at > ?",
+                (key, now)
+            ).fetchone()
+            if row is None:
+                self._record(False)
+                return default
+
+            conn.execute(f"UPDATE {self.table} SET last_access = ? WHERE key = ?", (now, key))
+            self._record(True)
+            return self._decode(row[0])
+        except (sqlite3.Error, ValueError, zlib.error) as e:
+            print(f"Cache read failed for {self.table}: {e}")
+            self._record(False)
+            return default
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Return {key: value} for the keys that are cached and fresh, in one query per 500 keys"""
+        found: Dict[str, Any] = {}
+        unique_keys = list(dict.fromkeys(keys))
+        try:
+            conn = self._connect()
+            now = time.time()
+            for start in range(0, len(unique_keys), 500):
+                chunk = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT key, value FROM {self.table} WHERE key IN ({placeholders}) AND expires_at > ?",
+                    (*chunk, now)
+                ).fetchall()
+                for key, data in rows:
+                    try:
+                        found[key] = self._decode(data)
+                    except (ValueError, zlib.error) as e:
+                        print(f"Cache read failed for {self.table}: {e}")
+                if rows:
+                    conn.execute(
+                        f"UPDATE {self.table} SET last_access = ? WHERE key IN ({placeholders}) AND expires_at > ?",
+                        (now, *chunk, now)
+                    )
+        except sqlite3.Error as e:
+            print(f"Cache read failed for {self.table}: {e}")
+        with self._stats_lock:
+            self.hits += len(found)
+            self.misses += len(unique_keys) - len(found)
+        return found
+
+    def get_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return {"value", "expired", "created_at", "expires_at"} for key even if it has expired.
+
+        Used for conditional revalidation, where a stale entry's validators
+        (ETag, Last-Modified) are still useful. Only fresh entries count as hits.
+        """
+        try:
+            conn = self._connect()
+            now = time.time()
+            row = conn.execute(
+                f"SELECT value, expires_at, created_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._record(False)
+                return None
+
+            expired = row[1] <= now
+            self._record(not expired)
+            if not expired:
+                conn.execute(f"UPDATE {self.table} SET last_access = ? WHERE key = ?", (now, key))
+            return {"value": self._decode(row[0]), "expired": expired,
+                    "created_at": row[2], "expires_at": row[1]}
+        except (sqlite3.Error, ValueError, zlib.error) as e:
+            print(f"Cache read failed for {self.table}: {e}")
+            self._record(False)
+            return None
+
+    def touch(self, key: str, ttl_seconds: Optional[float] = None) -> bool:
+        """Extend an entry's expiry without rewriting its value"""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        try:
+            now = time.time()
+            return self._connect().execute(
+                f"UPDATE {self.table} SET expires_at = ?, last_access = ? WHERE key = ?",
+                (now + ttl, now, key)
+            ).rowcount > 0
+        except sqlite3.Error as e:
+            print(f"Cache touch failed for {self.table}: {e}")
+            return False
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        """Insert or replace a value, then evict entries beyond the size caps"""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        try:
+            data = self._encode(value)
+            now = time.time()
+            conn = self._connect()
+            replaced = conn.execute(f"SELECT size FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            conn.execute(
+                f"""INSERT INTO {self.table} (key, value, size, created_at, expires_at, last_access)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET
+                        value = excluded.value, size = excluded.size, created_at = excluded.created_at,
+                        expires_at = excluded.expires_at, last_access = excluded.last_access""",
+                (key, data, len(data), now, now + ttl, now)
+            )
+            if replaced is None:
+                self._adjust_totals(1, len(data))
+            else:
+                self._adjust_totals(0, len(data) - replaced[0])
+            self._evict(conn)
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            print(f"Cache write failed for {self.table}: {e}")
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Drop expired entries, then least recently used ones until under the caps"""
+        if self.max_entries is None and self.max_bytes is None:
+            return
+
+        with self._stats_lock:
+            count, total_bytes = self._count, self._bytes
+        if not self._over_limit(count, total_bytes):
+            return
+
+        # Over a cap: the purge resyncs the totals, and each LRU batch evicts at least 5% of the entries,
+        # so the recounts below run once per many writes rather than on every write
+        evicted = self.purge_expired()
+        with self._stats_lock:
+            count, total_bytes = self._count, self._bytes
+
+        while count and self._over_limit(count, total_bytes):
+            excess = count - self.max_entries if self.max_entries is not None else 0
+            batch = max(1, excess, count // 20)
+            deleted = conn.execute(
+                f"""DELETE FROM {self.table} WHERE key IN (
+                        SELECT key FROM {self.table} ORDER BY last_access LIMIT ?)""",
+                (batch,)
+            ).rowcount
+            evicted += deleted
+            self._load_totals(conn)
+            with self._stats_lock:
+                count, total_bytes = self._count, self._bytes
+
+        with self._stats_lock:
+            self.evictions += evicted
+
+    def _over_limit(self, count: int, total_bytes: int) -> bool:
+        if self.max_entries is not None and count > self.max_entries:
+            return True
+        return self.max_bytes is not None and total_bytes > self.max_bytes
+
+    def delete(self, key: str):
+        """Remove a single entry"""
+        try:
+            conn = self._connect()
+            row = conn.execute(f"SELECT size FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            if conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,)).rowcount and row:
+                self._adjust_totals(-1, -row[0])
+        except sqlite3.Error as e:
+            print(f"Cache delete failed for {self.table}: {e}")
+
+    def clear(self):
+        """Remove every entry"""
+        try:
+            self._connect().execute(f"DELETE FROM {self.table}")
+            with self._stats_lock:
+                self._count, self._bytes = 0, 0
+        except sqlite3.Error as e:
+            print(f"Cache clear failed for {self.table}: {e}")
+
+    def purge_expired(self) -> int:
+        """Delete expired entries and return how many were removed (also resyncs the running totals)"""
+        try:
+            conn = self._connect()
+            purged = conn.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),)).rowcount
+            self._load_totals(conn)
+            return purged
+        except sqlite3.Error as e:
+            print(f"Cache purge failed for {self.table}: {e}")
+            return 0
+
+    def keys(self, limit: Optional[int] = None) -> List[str]:
+        """Unexpired keys, most recently written first"""
+        try:
+            return [row[0] for row in self._connect().execute(
+                f"SELECT key FROM {self.table} WHERE expires_at > ? ORDER BY created_at DESC LIMIT ?",
+                (time.time(), -1 if limit is None else limit)
+            )]
+        except sqlite3.Error as e:
+            print(f"Cache read failed for {self.table}: {e}")
+            return []
+
+    def checkpoint(self):
+        """Fold the WAL back into the main database file"""
+        try:
+            self._connect().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except sqlite3.Error as e:
+            print(f"Cache checkpoint failed for {self.table}: {e}")
+
+    def __contains__(self, key: str) -> bool:
+        try:
+            row = self._connect().execute(
+                f"SELECT 1 FROM {self.table} WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+            return row is not None
+        except sqlite3.Error:
+            return False
+
+    def __len__(self) -> int:
+        try:
+            return self._connect().execute(
+                f"SELECT COUNT(*) FROM {self.table} WHERE expires_at > ?", (time.time(),)
+            ).fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters and current size (from the running totals)"""
+        try:
+            self._connect()
+        except sqlite3.Error:
+            pass
+
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": self._count,
+                "size_bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+
+class MemoryCache:
+    """In-process LRU cache with a TTL and a memory budget in bytes.
+
+    Values are held as encoded JSON, which gives an honest size for the
+    budget and hands every reader its own copy.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        """Initialize an empty cache"""
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return a copy of the cached value, or default when missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= time.time():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            data = entry[0]
+        return json.loads(data)
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        """Insert or replace a value, evicting least recently used entries to fit"""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        try:
+            data = json.dumps(value, default=str).encode()
+        except (TypeError, ValueError) as e:
+            print(f"Memory cache write failed: {e}")
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if len(data) > self.max_bytes or ttl <= 0:
+                return
+            self._entries[key] = (data, time.time() + ttl)
+            self.size_bytes += len(data)
+            while self.size_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: str):
+        data, _ = self._entries.pop(key)
+        self.size_bytes -= len(data)
+
+    def delete(self, key: str):
+        """Remove a single entry"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        """Remove every entry"""
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def purge_expired(self) -> int:
+        """Drop expired entries and return how many were removed"""
+        now = time.time()
+        with self._lock:
+            expired = [key for key, (_, expires_at) in self._entries.items() if expires_at <= now]
+            for key in expired:
+                self._remove(key)
+        return len(expired)
+
+    def checkpoint(self):
+        """Nothing to flush for an in-memory cache"""
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self.size_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+
+class TieredCache:
+    """A MemoryCache in front of a SQLiteCache with write-through.
+
+    Writes go to both tiers; reads try memory first and promote store hits
+    for whatever lifetime the stored entry has left.
+    """
+
+    def __init__(self, memory: MemoryCache, store: SQLiteCache):
+        """Initialize with the two tiers"""
+        self.memory = memory
+        self.store = store
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the cached value from the fastest tier that has it"""
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+
+        entry = self.store.get_entry(key)
+        if entry is None or entry["expired"]:
+            return default
+
+        self.memory.set(key, entry["value"], ttl_seconds=entry["expires_at"] - time.time())
+        return entry["value"]
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        """Write the value to both tiers"""
+        self.store.set(key, value, ttl_seconds)
+        self.memory.set(key, value, ttl_seconds)
+
+    def delete(self, key: str):
+        """Remove a key from both tiers"""
+        self.memory.delete(key)
+        self.store.delete(key)
+
+    def clear(self):
+        """Remove every entry from both tiers"""
+        self.memory.clear()
+        self.store.clear()
+
+    def purge_expired(self) -> int:
+        """Purge both tiers; returns the count removed from the store"""
+        self.memory.purge_expired()
+        return self.store.purge_expired()
+
+    def checkpoint(self):
+        """Checkpoint the persistent tier"""
+        self.store.checkpoint()
+
+    def keys(self, limit: Optional[int] = None) -> List[str]:
+        """Unexpired keys in the persistent tier, most recently written first"""
+        return self.store.keys(limit)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.store
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Stats for each tier"""
+        return {
+            "memory": self.memory.get_stats(),
+            "persistent": self.store.get_stats()
+        }
+
+
+class CacheCompactor:
+    """Background thread that periodically purges expired entries.
+
+    Keeps expiry work off the startup and request paths: caches are opened
+    lazily and lookups only read unexpired rows through the expires_at index,
+    so stale rows can be removed at leisure.
+    """
+
+    def __init__(self, caches: List[Any], interval_seconds: float):
+        """Initialize the compactor; call start() to begin"""
+        self.caches = caches
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.runs = 0
+        self.purged = 0
+
+    def add(self, cache: Any):
+        """Register another store exposing purge_expired() and checkpoint()"""
+        self.caches.append(cache)
+
+    def start(self):
+        """Start the compactor thread if it is not already running"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="cache-compactor", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        """Signal the thread to exit and wait for it"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def compact_once(self) -> int:
+        """Purge expired entries from every cache and checkpoint the WAL"""
+        purged = 0
+        for cache in self.caches:
+            purged += cache.purge_expired()
+            cache.checkpoint()
+        self.runs += 1
+        self.purged += purged
+        return purged
+
+    def _run(self):
+        # Wait one interval first so compaction never competes with startup
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                purged = self.compact_once()
+                if purged:
+                    print(f"🧹 Cache compactor purged {purged} expired entries")
+            except Exception as e:
+                print(f"Cache compaction failed: {e}")
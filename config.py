@@ -9,17 +9,67 @@ GROQ_BASE_URL = "https://api.groq.com/openai/v1/chat/completions"
 DEFAULT_MODEL = "llama3-8b-8192"
 ALTERNATIVE_MODEL = "llama3-70b-8192"
 
+# Groq HTTP connection pool size (keep-alive connections shared by all LLM calls)
+GROQ_MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", "100"))
+
+# Groq quota used by the shared rate limiter until x-ratelimit-* headers report the real values
+GROQ_REQUESTS_PER_MINUTE = float(os.getenv("GROQ_REQUESTS_PER_MINUTE", "30"))
+GROQ_TOKENS_PER_MINUTE = float(os.getenv("GROQ_TOKENS_PER_MINUTE", "30000"))
+
 # Search Configuration
 GOOGLE_SEARCH_API_KEY = os.getenv("GOOGLE_SEARCH_API_KEY", "")
 GOOGLE_SEARCH_ENGINE_ID = os.getenv("GOOGLE_SEARCH_ENGINE_ID", "")
 SERPAPI_KEY = os.getenv("SERPAPI_KEY", "")
 
 # Application Configuration
-MAX_CANDIDATES = 20
+MAX_CANDIDATES = int(os.getenv("MAX_CANDIDATES", "20"))
 BATCH_SIZE = 5
 TIMEOUT_SECONDS = 30
 MAX_RETRIES = 3
 
+# Profile fetching: global concurrency cap and per-domain politeness
+FETCH_MAX_CONCURRENCY = int(os.getenv("FETCH_MAX_CONCURRENCY", "10"))
+FETCH_MAX_PER_HOST = int(os.getenv("FETCH_MAX_PER_HOST", "4"))
+FETCH_MIN_HOST_INTERVAL = float(os.getenv("FETCH_MIN_HOST_INTERVAL", "0.25"))
+
+# Packed scoring: several candidates per LLM call, sized to fit a token budget
+SCORING_PACK_CANDIDATES = True
+SCORING_BATCH_TOKEN_BUDGET = 6000
+SCORING_MAX_BATCH_SIZE = 8
+SCORING_OUTPUT_TOKENS_PER_CANDIDATE = 150
+
+# Maximum scoring requests in flight at once (further pacing comes from the shared rate limiter)
+SCORING_MAX_CONCURRENCY = int(os.getenv("SCORING_MAX_CONCURRENCY", "4"))
+
+# Scoring mode: "standard" scores everyone on DEFAULT_MODEL; "cascade" screens everyone on
+# DEFAULT_MODEL, then re-scores candidates near the top-N cutoff or with ambiguous breakdowns on ALTERNATIVE_MODEL;
+# "fast" scores everyone with the local keyword heuristic (no scoring LLM calls)
+SCORING_MODE = os.getenv("SCORING_MODE", "standard")
+CASCADE_CUTOFF_MARGIN = 0.75
+CASCADE_AMBIGUOUS_SPREAD = 5
+CASCADE_MAX_RESCORE_FRACTION = 0.5
+
+# Lexical prefilter: when search returns more than PREFILTER_TOP_K profiles, rank them against the JD
+# ("bm25", or "heuristic" for the local rubric scorer) and send only the best PREFILTER_TOP_K to LLM scoring.
+# Latency cost: ranking needs every profile, so scoring cannot overlap fetching. The first score arrives
+# only after the slowest profile fetch (about one fetch timeout in the worst case) instead of after the
+# first. Kept profiles are streamed into scoring as soon as ranking finishes. Disable it, or raise
+# PREFILTER_TOP_K to MAX_CANDIDATES, when latency matters more than LLM cost.
+# Recall cost (python benchmark.py prefilter, 200 synthetic profiles, share of the true top 10 kept):
+# BM25 0.48 / 0.66 / 0.88 and heuristic 0.26 / 0.40 / 0.56 at PREFILTER_TOP_K 10 / 20 / 40. The default,
+# 20 of 40 profiles, keeps 0.94 (BM25) / 0.77 (heuristic) and halves the scoring calls.
+PREFILTER_ENABLED = os.getenv("PREFILTER_ENABLED", "true").lower() == "true"
+PREFILTER_METHOD = os.getenv("PREFILTER_METHOD", "bm25")
+PREFILTER_TOP_K = int(os.getenv("PREFILTER_TOP_K", "20"))
+# With the prefilter on, search twice as wide as it keeps by default; otherwise it never drops anyone
+if PREFILTER_ENABLED and "MAX_CANDIDATES" not in os.environ:
+    MAX_CANDIDATES = 2 * PREFILTER_TOP_K
+
+# Streaming pipeline: bounded queue between profile fetching and scoring, and how long the
+# scorer waits for more profiles to fill a packed scoring group
+PIPELINE_QUEUE_SIZE = 32
+PIPELINE_SCORING_LINGER_SECONDS = 1.0
+
 # Scoring Rubric Weights
 SCORING_RUBRIC = {
     "education": 0.20,
@@ -30,9 +80,64 @@ SCORING_RUBRIC = {
     "tenure": 0.10
 }
 
-# Cache Configuration
-CACHE_FILE = "cache.json"
+# /batch runs at most this many pipelines at once on the API event loop
+BATCH_MAX_CONCURRENT_JOBS = int(os.getenv("BATCH_MAX_CONCURRENT_JOBS", "5"))
+# Scoring/messaging calls in flight across all jobs of a batch
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "8"))
+
+# Background job queue behind /match/async (size workers to the Groq quota)
+JOB_QUEUE_FILE = os.getenv("JOB_QUEUE_FILE", "jobs.db")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_LEASE_SECONDS = 900
+JOB_RETENTION_HOURS = 24
+# A job whose worker died this many times (e.g. it crashes the process) is failed instead of retried
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+# Cache Configuration (pipeline results, one row per job description)
+CACHE_FILE = os.getenv("CACHE_FILE", "cache.db")
 CACHE_EXPIRY_HOURS = 24
+LEGACY_CACHE_FILE = "cache.json"
+CACHE_COMPACT_INTERVAL_MINUTES = 30
+# Per-stage checkpoints (requirements, URLs, per-candidate scores and messages) for resuming runs
+CHECKPOINT_ENABLED = os.getenv("CHECKPOINT_ENABLED", "true").lower() == "true"
+CHECKPOINT_TTL_HOURS = 24
+# In-memory tier in front of the result store (LRU + TTL, write-through)
+RESULT_MEMORY_CACHE_MAX_BYTES = int(os.getenv("RESULT_MEMORY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Reuse results of near-duplicate JDs (shingle Jaccard similarity, edits must not touch requirements)
+JD_NEAR_DUPLICATE_ENABLED = os.getenv("JD_NEAR_DUPLICATE_ENABLED", "true").lower() == "true"
+JD_NEAR_DUPLICATE_MIN_SIMILARITY = float(os.getenv("JD_NEAR_DUPLICATE_MIN_SIMILARITY", "0.8"))
+
+# LLM response cache (content-addressed, keyed by model/messages/temperature/max_tokens)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_FILE = os.getenv("LLM_CACHE_FILE", "llm_cache.db")
+LLM_CACHE_TTL_HOURS = 24 * 7
+LLM_CACHE_MAX_ENTRIES = 20000
+LLM_CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+# Profile page cache (extracted text per canonical profile URL, revalidated with ETag/Last-Modified)
+PROFILE_CACHE_ENABLED = os.getenv("PROFILE_CACHE_ENABLED", "true").lower() == "true"
+PROFILE_CACHE_FILE = os.getenv("PROFILE_CACHE_FILE", "profile_cache.db")
+PROFILE_CACHE_TTL_HOURS = 72
+PROFILE_CACHE_MAX_ENTRIES = 50000
+
+# Search provider fan-out: query every configured provider concurrently, each with its own deadline (seconds)
+SEARCH_FAN_OUT = os.getenv("SEARCH_FAN_OUT", "true").lower() == "true"
+SEARCH_PROVIDER_DEADLINES = {
+    "serpapi": 20,
+    "google_cse": 20,
+    "google_scrape": 15
+}
+
+# Search provider result cache (keyed by provider + normalized query; empty/failed results cached briefly)
+SEARCH_CACHE_ENABLED = os.getenv("SEARCH_CACHE_ENABLED", "true").lower() == "true"
+SEARCH_CACHE_FILE = os.getenv("SEARCH_CACHE_FILE", "search_cache.db")
+SEARCH_CACHE_TTL_HOURS = {
+    "serpapi": 24,
+    "google_cse": 24,
+    "google_scrape": 6
+}
+SEARCH_CACHE_NEGATIVE_TTL_MINUTES = 15
+SEARCH_CACHE_MAX_ENTRIES = 10000
 
 # FastAPI Configuration
 API_HOST = "127.0.0.1"
@@ -45,16 +150,66 @@ def get_config() -> Dict[str, Any]:
         "groq_base_url": GROQ_BASE_URL,
         "default_model": DEFAULT_MODEL,
         "alternative_model": ALTERNATIVE_MODEL,
+        "groq_max_connections": GROQ_MAX_CONNECTIONS,
+        "groq_requests_per_minute": GROQ_REQUESTS_PER_MINUTE,
+        "groq_tokens_per_minute": GROQ_TOKENS_PER_MINUTE,
         "google_search_api_key": GOOGLE_SEARCH_API_KEY,
         "google_search_engine_id": GOOGLE_SEARCH_ENGINE_ID,
         "serpapi_key": SERPAPI_KEY,
         "max_candidates": MAX_CANDIDATES,
+        "fetch_max_concurrency": FETCH_MAX_CONCURRENCY,
+        "fetch_max_per_host": FETCH_MAX_PER_HOST,
+        "fetch_min_host_interval": FETCH_MIN_HOST_INTERVAL,
         "batch_size": 3,
         "timeout_seconds": 60,
         "max_retries": 4,
         "scoring_rubric": SCORING_RUBRIC,
+        "scoring_pack_candidates": SCORING_PACK_CANDIDATES,
+        "scoring_batch_token_budget": SCORING_BATCH_TOKEN_BUDGET,
+        "scoring_max_batch_size": SCORING_MAX_BATCH_SIZE,
+        "scoring_output_tokens_per_candidate": SCORING_OUTPUT_TOKENS_PER_CANDIDATE,
+        "scoring_max_concurrency": SCORING_MAX_CONCURRENCY,
+        "scoring_mode": SCORING_MODE,
+        "cascade_cutoff_margin": CASCADE_CUTOFF_MARGIN,
+        "cascade_ambiguous_spread": CASCADE_AMBIGUOUS_SPREAD,
+        "cascade_max_rescore_fraction": CASCADE_MAX_RESCORE_FRACTION,
+        "prefilter_enabled": PREFILTER_ENABLED,
+        "prefilter_method": PREFILTER_METHOD,
+        "prefilter_top_k": PREFILTER_TOP_K,
+        "pipeline_queue_size": PIPELINE_QUEUE_SIZE,
+        "pipeline_scoring_linger_seconds": PIPELINE_SCORING_LINGER_SECONDS,
+        "batch_max_concurrent_jobs": BATCH_MAX_CONCURRENT_JOBS,
+        "batch_llm_concurrency": BATCH_LLM_CONCURRENCY,
+        "job_queue_file": JOB_QUEUE_FILE,
+        "job_workers": JOB_WORKERS,
+        "job_lease_seconds": JOB_LEASE_SECONDS,
+        "job_retention_hours": JOB_RETENTION_HOURS,
+        "job_max_attempts": JOB_MAX_ATTEMPTS,
         "cache_file": CACHE_FILE,
         "cache_expiry_hours": CACHE_EXPIRY_HOURS,
+        "legacy_cache_file": LEGACY_CACHE_FILE,
+        "cache_compact_interval_minutes": CACHE_COMPACT_INTERVAL_MINUTES,
+        "checkpoint_enabled": CHECKPOINT_ENABLED,
+        "checkpoint_ttl_hours": CHECKPOINT_TTL_HOURS,
+        "result_memory_cache_max_bytes": RESULT_MEMORY_CACHE_MAX_BYTES,
+        "jd_near_duplicate_enabled": JD_NEAR_DUPLICATE_ENABLED,
+        "jd_near_duplicate_min_similarity": JD_NEAR_DUPLICATE_MIN_SIMILARITY,
+        "llm_cache_enabled": LLM_CACHE_ENABLED,
+        "llm_cache_file": LLM_CACHE_FILE,
+        "llm_cache_ttl_hours": LLM_CACHE_TTL_HOURS,
+        "llm_cache_max_entries": LLM_CACHE_MAX_ENTRIES,
+        "llm_cache_max_bytes": LLM_CACHE_MAX_BYTES,
+        "profile_cache_enabled": PROFILE_CACHE_ENABLED,
+        "profile_cache_file": PROFILE_CACHE_FILE,
+        "profile_cache_ttl_hours": PROFILE_CACHE_TTL_HOURS,
+        "profile_cache_max_entries": PROFILE_CACHE_MAX_ENTRIES,
+        "search_fan_out": SEARCH_FAN_OUT,
+        "search_provider_deadlines": SEARCH_PROVIDER_DEADLINES,
+        "search_cache_enabled": SEARCH_CACHE_ENABLED,
+        "search_cache_file": SEARCH_CACHE_FILE,
+        "search_cache_ttl_hours": SEARCH_CACHE_TTL_HOURS,
+        "search_cache_negative_ttl_minutes": SEARCH_CACHE_NEGATIVE_TTL_MINUTES,
+        "search_cache_max_entries": SEARCH_CACHE_MAX_ENTRIES,
         "api_host": API_HOST,
         "api_port": 5000
     }
@@ -1,9 +1,215 @@
 import json
 import re
+import asyncio
+import threading
+import weakref
 import requests
+import httpx
 import time
-from typing import Dict, Any, Optional, List
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, Optional, List, Generator, Tuple
 from config import get_config
+from cache_store import SQLiteCache
+
+def _parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse a Groq rate-limit duration such as "2m59.56s", "7.66s" or "120ms" into seconds"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    units = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+    parts = re.findall(r'(\d+(?:\.\d+)?)(ms|h|m|s)', value)
+    if not parts:
+        return None
+    return sum(float(amount) * units[unit] for amount, unit in parts)
+
+
+def _parse_number(value: Optional[str]) -> Optional[float]:
+    """Parse a numeric header value, returning None when absent or malformed"""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def estimate_tokens(messages: List[Dict[str, str]], max_tokens: int) -> int:
+    """Rough token cost of a chat request (~4 characters per token plus the completion budget)"""
+    prompt_chars = sum(len(message.get("content", "")) for message in messages)
+    return prompt_chars // 4 + max_tokens
+
+
+class RateLimiter:
+    """Token bucket pacing one Groq model's requests-per-minute and tokens-per-minute.
+
+    Buckets start from the configured limits and are corrected from the
+    ``x-ratelimit-*`` headers on every response, so callers run at the real
+    quota instead of behind fixed sleeps. Groq limits are per model, so each
+    model gets its own limiter (see get_rate_limiter).
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self._lock = threading.Lock()
+        self.request_capacity = float(requests_per_minute)
+        self.token_capacity = float(tokens_per_minute)
+        self._request_balance = self.request_capacity
+        self._token_balance = self.token_capacity
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0.0
+        self.total_wait_seconds = 0.0
+        self.rate_limited_count = 0
+
+    def _refill(self, now: float):
+        """Top up both buckets for the time elapsed since the last refill"""
+        elapsed = now - self._last_refill
+        if elapsed > 0:
+            self._request_balance = min(self.request_capacity,
+                                        self._request_balance + elapsed * self.request_capacity / 60.0)
+            self._token_balance = min(self.token_capacity,
+                                      self._token_balance + elapsed * self.token_capacity / 60.0)
+            self._last_refill = now
+
+    def _reserve(self, tokens: int) -> float:
+        """Reserve one request and ``tokens`` tokens, returning how long the caller must wait"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+
+            tokens = min(float(tokens), self.token_capacity)
+            self._request_balance -= 1
+            self._token_balance -= tokens
+
+            wait = max(0.0, self._blocked_until - now)
+            if self._request_balance < 0:
+                wait = max(wait, -self._request_balance * 60.0 / self.request_capacity)
+            if self._token_balance < 0:
+                wait = max(wait, -self._token_balance * 60.0 / self.token_capacity)
+
+            self.total_wait_seconds += wait
+            return wait
+
+    def acquire(self, tokens: int):
+        """Block the calling thread until the request fits in the current quota"""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, tokens: int):
+        """Async version of acquire; yields to the event loop while waiting"""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def release(self, tokens: int):
+        """Credit back the reservation of an attempt that never reached Groq (no response arrived)"""
+        with self._lock:
+            self._request_balance = min(self.request_capacity, self._request_balance + 1)
+            self._token_balance = min(self.token_capacity,
+                                      self._token_balance + min(float(tokens), self.token_capacity))
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: Optional[int]):
+        """Return over-reserved tokens once the response reports its real usage"""
+        if actual_tokens is None:
+            return
+        with self._lock:
+            self._token_balance = min(self.token_capacity,
+                                      self._token_balance + estimated_tokens - actual_tokens)
+
+    def update_from_headers(self, headers):
+        """Sync bucket state with Groq's x-ratelimit-* response headers"""
+        limit_tokens = _parse_number(headers.get("x-ratelimit-limit-tokens"))
+        remaining_tokens = _parse_number(headers.get("x-ratelimit-remaining-tokens"))
+        remaining_requests = _parse_number(headers.get("x-ratelimit-remaining-requests"))
+        reset_tokens = _parse_duration(headers.get("x-ratelimit-reset-tokens"))
+        reset_requests = _parse_duration(headers.get("x-ratelimit-reset-requests"))
+
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+
+            if limit_tokens:
+                self.token_capacity = limit_tokens
+            if remaining_tokens is not None:
+                self._token_balance = min(self._token_balance, remaining_tokens)
+            if remaining_requests is not None:
+                self._request_balance = min(self._request_balance, remaining_requests)
+
+            if remaining_requests is not None and remaining_requests < 1 and reset_requests:
+                self._blocked_until = max(self._blocked_until, now + reset_requests)
+            if remaining_tokens is not None and remaining_tokens < 1 and reset_tokens:
+                self._blocked_until = max(self._blocked_until, now + reset_tokens)
+
+    def handle_rate_limited(self, headers) -> float:
+        """Record a 429 response and pause all callers; returns the pause length in seconds"""
+        self.update_from_headers(headers)
+        retry_after = _parse_duration(headers.get("retry-after"))
+
+        with self._lock:
+            now = time.monotonic()
+            self.rate_limited_count += 1
+            if retry_after is None and self._blocked_until <= now:
+                retry_after = 60.0
+            if retry_after is not None:
+                self._blocked_until = max(self._blocked_until, now + retry_after)
+            return max(0.0, self._blocked_until - now)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Current limiter state for status endpoints"""
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                "requests_per_minute": self.request_capacity,
+                "tokens_per_minute": self.token_capacity,
+                "available_requests": round(self._request_balance, 2),
+                "available_tokens": round(self._token_balance, 2),
+                "rate_limited_count": self.rate_limited_count,
+                "total_wait_seconds": round(self.total_wait_seconds, 2)
+            }
+
+
+_rate_limiters: Dict[str, RateLimiter] = {}
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter(model: Optional[str] = None) -> RateLimiter:
+    """Return the process-wide rate limiter for a Groq model (DEFAULT_MODEL if none), shared by every GroqClient"""
+    config = get_config()
+    model = model or config["default_model"]
+    with _rate_limiter_lock:
+        if model not in _rate_limiters:
+            _rate_limiters[model] = RateLimiter(
+                config["groq_requests_per_minute"],
+                config["groq_tokens_per_minute"]
+            )
+        return _rate_limiters[model]
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[SQLiteCache]:
+    """Return the process-wide LLM response cache, or None when disabled"""
+    global _response_cache
+    config = get_config()
+    if not config["llm_cache_enabled"]:
+        return None
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = SQLiteCache(
+                config["llm_cache_file"],
+                "llm_responses",
+                ttl_seconds=config["llm_cache_ttl_hours"] * 3600,
+                max_entries=config["llm_cache_max_entries"],
+                max_bytes=config["llm_cache_max_bytes"]
+            )
+        return _response_cache
+
 
 class GroqClient:
     def __init__(self, api_key: str = None, model: str = None):
@@ -15,10 +221,59 @@ class GroqClient:
         self.alternative_model = config["alternative_model"]
         self.timeout = config["timeout_seconds"]
         self.max_retries = config["max_retries"]
+        self.max_connections = config["groq_max_connections"]
+        self.rate_limiter = get_rate_limiter(self.model)
+        self.response_cache = get_response_cache()
 
         if not self.api_key:
             raise ValueError("Groq API key is required. Set GROQ_API_KEY environment variable.")
 
+        # Keep-alive session for the synchronous path (one TLS handshake per pooled connection)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_connections)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(self._headers())
+
+        # httpx.AsyncClient is bound to the loop it was first used on, so keep one per loop
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._async_clients_lock = threading.Lock()
+
+    def _headers(self) -> Dict[str, str]:
+        """HTTP headers for Groq API requests"""
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """Return the pooled async HTTP client for the running event loop"""
+        loop = asyncio.get_running_loop()
+        with self._async_clients_lock:
+            client = self._async_clients.get(loop)
+            if client is None or client.is_closed:
+                client = httpx.AsyncClient(
+                    headers=self._headers(),
+                    timeout=self.timeout,
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections
+                    )
+                )
+                self._async_clients[loop] = client
+            return client
+
+    async def aclose(self):
+        """Close the pooled async HTTP client for the running event loop"""
+        loop = asyncio.get_running_loop()
+        with self._async_clients_lock:
+            client = self._async_clients.pop(loop, None)
+        if client is not None:
+            await client.aclose()
+
+    def close(self):
+        """Close the pooled synchronous HTTP session"""
+        self.session.close()
+
     def clean_json_response(self, response_text: str) -> str:
         """Clean and extract JSON from AI model response"""
         # Remove common prefixes
@@ -34,78 +289,49 @@ class GroqClient:
 
         return response_text.strip()
 
+    def clean_json_array_response(self, response_text: str) -> str:
+        """Extract the first complete JSON array from AI model response"""
+        if not response_text:
+            return ""
+
+        start_idx = response_text.find('[')
+        if start_idx == -1:
+            return ""
+
+        # Walk the text tracking nesting depth, ignoring brackets inside strings
+        depth = 0
+        in_string = False
+        escaped = False
+        for i in range(start_idx, len(response_text)):
+            char = response_text[i]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == '\\':
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char in '[{':
+                depth += 1
+            elif char in ']}':
+                depth -= 1
+                if depth == 0:
+                    return response_text[start_idx:i + 1]
+
+        return ""
+
     def _make_request(self, prompt: str, temperature: float = 0.7, model: str = None) -> Optional[str]:
         """Make a request to Groq API with improved retry logic"""
-        current_model = model or self.model
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-
         payload = {
-            "model": current_model,
+            "model": model or self.model,
             "messages": [{"role": "user", "content": prompt}],
             "temperature": temperature,
             "max_tokens": 1024,
             "top_p": 0.9
         }
-
-        for attempt in range(self.max_retries):
-            try:
-                response = requests.post(
-                    self.base_url, 
-                    headers=headers, 
-                    json=payload, 
-                    timeout=self.timeout
-                )
-
-                if response.status_code == 200:
-                    data = response.json()
-                    if "choices" in data and len(data["choices"]) > 0:
-                        return data["choices"][0]["message"]["content"]
-                    else:
-                        print(f"Unexpected response format: {data}")
-                        return None
-
-                elif response.status_code == 429:  # Rate limit
-                    wait_time = min(60, (2 ** attempt) + (attempt * 2))  # Exponential backoff with jitter
-                    print(f"Rate limited. Waiting {wait_time} seconds before retry {attempt + 1}")
-                    time.sleep(wait_time)
-
-                elif response.status_code == 400:
-                    error_data = response.json() if response.content else {}
-                    error_message = error_data.get('error', {}).get('message', 'Unknown error')
-
-                    if current_model == self.model and 'model' in error_message.lower():
-                        # Try alternative model if primary fails
-                        print(f"Model {current_model} failed ({error_message}), trying {self.alternative_model}")
-                        current_model = self.alternative_model
-                        payload["model"] = current_model
-                        continue
-                    else:
-                        print(f"API request failed: {error_message}")
-                        return None
-
-                elif response.status_code == 401:
-                    print(f"Authentication failed. Check API key.")
-                    return None
-
-                else:
-                    print(f"API request failed with status {response.status_code}: {response.text}")
-                    if attempt < self.max_retries - 1:
-                        time.sleep(2 ** attempt)
-
-            except requests.exceptions.Timeout:
-                print(f"Request timeout on attempt {attempt + 1}")
-                if attempt < self.max_retries - 1:
-                    time.sleep(2)
-            except requests.exceptions.RequestException as e:
-                print(f"Request error on attempt {attempt + 1}: {e}")
-                if attempt < self.max_retries - 1:
-                    time.sleep(2)
-
-        print(f"Failed to get response after {self.max_retries} attempts")
-        return None
+        return self._perform(self._request_steps(payload, use_cache=False))
 
     def _clean_json_response(self, response: str) -> str:
         """Clean and extract JSON from response"""
@@ -236,9 +462,9 @@ Return ONLY the message text without quotes or formatting.
                         break
         return response
 
-    def extract_job_requirements(self, job_description: str) -> Optional[Dict[str, Any]]:
-        """Extract structured requirements from job description"""
-        messages = [
+    def _job_requirements_messages(self, job_description: str) -> List[Dict[str, str]]:
+        """Build the chat messages for job requirements extraction"""
+        return [
             {
                 "role": "system",
                 "content": """You are an expert job analyst. Extract key requirements from job descriptions.
@@ -262,7 +488,8 @@ Return a JSON object with these exact keys:
             }
         ]
 
-        response = self.make_request(messages)
+    def _parse_job_requirements(self, response: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Parse the job requirements extraction response"""
         if not response:
             print("No response from API for job requirements extraction")
             return None
@@ -284,64 +511,179 @@ Return a JSON object with these exact keys:
                 "company_type": "Unknown"
             }
 
-    def make_request(self, messages: List[Dict[str, str]], model: str = None) -> Optional[str]:
-        """Make a request to Groq API with retry logic and exponential backoff"""
-        model = model or self.model
+    def extract_job_requirements(self, job_description: str) -> Optional[Dict[str, Any]]:
+        """Extract structured requirements from job description"""
+        response = self.make_request(self._job_requirements_messages(job_description))
+        return self._parse_job_requirements(response)
 
-        payload = {
+    async def aextract_job_requirements(self, job_description: str) -> Optional[Dict[str, Any]]:
+        """Async version of job requirements extraction"""
+        response = await self.amake_request(self._job_requirements_messages(job_description))
+        return self._parse_job_requirements(response)
+
+    def _chat_payload(self, messages: List[Dict[str, str]], model: str, max_tokens: int = 1500) -> Dict[str, Any]:
+        """Build the chat completion payload used by make_request/amake_request"""
+        return {
             "model": model,
             "messages": messages,
             "temperature": 0.1,
-            "max_tokens": 1500,
+            "max_tokens": max_tokens,
             "top_p": 0.9
         }
 
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
+    def _response_cache_key(self, payload: Dict[str, Any]) -> str:
+        """Content-addressed cache key for a chat completion request"""
+        return SQLiteCache.make_key(
+            payload["model"], payload["messages"], payload["temperature"], payload["max_tokens"]
+        )
+
+    def _get_cached_response(self, payload: Dict[str, Any]) -> Optional[str]:
+        """Return a cached completion for this exact request, if any"""
+        if self.response_cache is None:
+            return None
+        return self.response_cache.get(self._response_cache_key(payload))
+
+    def _cache_response(self, cache_key_payload: Dict[str, Any], content: str):
+        """Store a completion under the key of the request that produced it"""
+        if self.response_cache is not None and content:
+            self.response_cache.set(self._response_cache_key(cache_key_payload), content)
+
+    @staticmethod
+    def _describe_error(error: Exception, attempt: int) -> str:
+        """Log line for a transport error of either HTTP client"""
+        if isinstance(error, (requests.exceptions.Timeout, httpx.TimeoutException)):
+            return f"Request timeout on attempt {attempt + 1}"
+        if isinstance(error, (requests.exceptions.ConnectionError, httpx.ConnectError)):
+            return f"Connection error on attempt {attempt + 1}"
+        return f"Request exception on attempt {attempt + 1}: {error}"
+
+    def _request_steps(self, payload: Dict[str, Any],
+                       use_cache: bool = True) -> Generator[Tuple[str, Any], Any, Optional[str]]:
+        """Cache lookup, rate limiting, retries and response handling of one chat completion, without I/O.
+
+        Yields the steps for a transport to perform: ("call", (fn, *args)) runs
+        a blocking helper and sends back its result, ("sleep", seconds),
+        ("acquire", (limiter, tokens)), and ("post", payload), answered with
+        the HTTP response or by throwing the transport error in. Returns the
+        raw completion content, or None when every attempt failed. _perform
+        and _aperform are the sync and async transports.
+        """
+        model = payload["model"]
+        if use_cache:
+            cached = yield "call", (self._get_cached_response, payload)
+            if cached is not None:
+                return cached
+        requested_payload = dict(payload)
+        estimated_tokens = estimate_tokens(payload["messages"], payload["max_tokens"])
+        rate_limited = False
 
         for attempt in range(self.max_retries):
+            # Exponential backoff with jitter (429s are paced by the shared rate limiter instead)
+            if attempt > 0 and not rate_limited:
+                wait_time = (2 ** attempt) + (attempt * 0.5)
+                print(f"Waiting {wait_time:.1f} seconds before retry {attempt + 1}...")
+                yield "sleep", wait_time
+            rate_limited = False
+            payload["model"] = model
+
+            limiter = get_rate_limiter(model)
+            yield "acquire", (limiter, estimated_tokens)
             try:
-                # Exponential backoff with jitter
-                if attempt > 0:
-                    wait_time = (2 ** attempt) + (attempt * 0.5)
-                    print(f"Waiting {wait_time:.1f} seconds before retry {attempt + 1}...")
-                    time.sleep(wait_time)
-
-                response = requests.post(
-                    self.base_url,
-                    json=payload,
-                    headers=headers,
-                    timeout=self.timeout
-                )
-
-                if response.status_code == 200:
-                    content = response.json()["choices"][0]["message"]["content"]
-                    return self.clean_json_response(content)
-                elif response.status_code == 429:
-                    retry_after = int(response.headers.get('retry-after', 60))
-                    print(f"Rate limited. Waiting {retry_after} seconds...")
-                    time.sleep(retry_after)
-                elif response.status_code >= 500:
-                    print(f"Server error {response.status_code}. Retrying...")
-                    continue
-                else:
-                    print(f"API request failed with status {response.status_code}: {response.text}")
-                    # Try alternative model on client errors
-                    if model == self.model and attempt < self.max_retries - 1:
-                        model = self.alternative_model
-                        print(f"Switching to alternative model: {model}")
-                        continue
-
-            except requests.exceptions.Timeout:
-                print(f"Request timeout on attempt {attempt + 1}")
-            except requests.exceptions.ConnectionError:
-                print(f"Connection error on attempt {attempt + 1}")
-            except requests.exceptions.RequestException as e:
-                print(f"Request exception on attempt {attempt + 1}: {e}")
+                response = yield "post", payload
             except Exception as e:
-                print(f"Unexpected error on attempt {attempt + 1}: {e}")
+                # No response, so Groq never saw the attempt: its reservation goes back to the bucket
+                limiter.release(estimated_tokens)
+                print(self._describe_error(e, attempt))
+                continue
+            limiter.update_from_headers(response.headers)
+
+            if response.status_code == 200:
+                try:
+                    data = response.json()
+                    content = data["choices"][0]["message"]["content"]
+                except (ValueError, KeyError, IndexError, TypeError) as e:
+                    print(f"Unexpected response format on attempt {attempt + 1}: {e}")
+                    continue
+                limiter.record_usage(estimated_tokens, data.get("usage", {}).get("total_tokens"))
+                if use_cache:
+                    yield "call", (self._cache_response, requested_payload, content)
+                return content
+
+            # Groq counted this attempt and its headers already synced the bucket, so nothing is refunded
+            if response.status_code == 429:
+                rate_limited = True
+                wait_time = limiter.handle_rate_limited(response.headers)
+                print(f"Rate limited. Pausing Groq requests for {wait_time:.1f} seconds...")
+            elif response.status_code >= 500:
+                print(f"Server error {response.status_code}. Retrying...")
+            else:
+                print(f"API request failed with status {response.status_code}: {response.text}")
+                # Try alternative model on client errors
+                if model == self.model and attempt < self.max_retries - 1:
+                    model = self.alternative_model
+                    print(f"Switching to alternative model: {model}")
 
         print(f"All {self.max_retries} attempts failed for model {model}")
-        return None
\ No newline at end of file
+        return None
+
+    def _perform(self, steps: Generator[Tuple[str, Any], Any, Optional[str]]) -> Optional[str]:
+        """Run request steps on the calling thread over the pooled requests session"""
+        reply, error = None, None
+        while True:
+            try:
+                kind, arg = steps.throw(error) if error is not None else steps.send(reply)
+            except StopIteration as done:
+                return done.value
+            reply, error = None, None
+            if kind == "post":
+                try:
+                    reply = self.session.post(self.base_url, json=arg, timeout=self.timeout)
+                except Exception as e:
+                    error = e
+            elif kind == "acquire":
+                arg[0].acquire(arg[1])
+            elif kind == "sleep":
+                time.sleep(arg)
+            else:
+                reply = arg[0](*arg[1:])
+
+    async def _aperform(self, steps: Generator[Tuple[str, Any], Any, Optional[str]]) -> Optional[str]:
+        """Run request steps on the event loop over the pooled httpx client"""
+        client = self._get_async_client()
+        reply, error = None, None
+        while True:
+            try:
+                kind, arg = steps.throw(error) if error is not None else steps.send(reply)
+            except StopIteration as done:
+                return done.value
+            reply, error = None, None
+            if kind == "post":
+                try:
+                    reply = await client.post(self.base_url, json=arg)
+                except Exception as e:
+                    error = e
+            elif kind == "acquire":
+                await arg[0].aacquire(arg[1])
+            elif kind == "sleep":
+                await asyncio.sleep(arg)
+            else:
+                # Blocking helpers (the SQLite response cache) stay off the event loop
+                reply = await asyncio.to_thread(*arg)
+
+    def make_request(self, messages: List[Dict[str, str]], model: str = None,
+                     max_tokens: int = 1500, clean_json: bool = True) -> Optional[str]:
+        """Make a request to Groq API with retry logic and exponential backoff"""
+        payload = self._chat_payload(messages, model or self.model, max_tokens)
+        content = self._perform(self._request_steps(payload))
+        if content is None:
+            return None
+        return self.clean_json_response(content) if clean_json else content
+
+    async def amake_request(self, messages: List[Dict[str, str]], model: str = None,
+                            max_tokens: int = 1500, clean_json: bool = True) -> Optional[str]:
+        """Async version of make_request over a pooled keep-alive connection"""
+        payload = self._chat_payload(messages, model or self.model, max_tokens)
+        content = await self._aperform(self._request_steps(payload))
+        if content is None:
+            return None
+        return self.clean_json_response(content) if clean_json else content
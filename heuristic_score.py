@@ -0,0 +1,196 @@
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import get_config
+from jd_index import normalize_job_description
+from score_matrix import SCORE_FIELDS, weight_vector
+
+EDUCATION_LEVELS = {
+    "phd": 10, "ph.d": 10, "doctorate": 10, "doctoral": 10,
+    "master": 8, "masters": 8, "m.s": 8, "msc": 8, "m.tech": 8, "mba": 7,
+    "bachelor": 6, "bachelors": 6, "b.s": 6, "bsc": 6, "b.tech": 6, "btech": 6, "b.e": 6,
+    "degree": 5, "university": 5, "college": 4,
+}
+TOP_SCHOOLS = ["mit", "stanford", "carnegie mellon", "cmu", "berkeley", "harvard", "caltech",
+               "princeton", "uiuc", "oxford", "cambridge", "eth zurich", "iit", "waterloo"]
+SENIORITY_LEVELS = {
+    "intern": 2, "junior": 3, "associate": 4, "engineer": 5, "developer": 5, "analyst": 5,
+    "scientist": 6, "researcher": 6, "senior": 7, "manager": 7, "lead": 8, "staff": 8,
+    "principal": 9, "head": 9, "director": 9, "founder": 9, "co-founder": 9,
+    "vp": 10, "vice president": 10, "cto": 10, "chief": 10,
+}
+PROMOTION_TERMS = ["promoted", "promotion"]
+KNOWN_COMPANIES = ["google", "deepmind", "meta", "facebook", "microsoft", "apple", "amazon", "aws",
+                   "openai", "anthropic", "nvidia", "netflix", "stripe", "uber", "airbnb", "databricks",
+                   "linkedin", "salesforce", "tesla", "spacex", "palantir", "snowflake", "scale ai",
+                   "hugging face", "cohere", "mistral", "codeium", "windsurf", "github", "cursor"]
+REMOTE_TERMS = ["remote", "hybrid"]
+
+STOPWORDS = set("""a an and are as at be by for from has have in is it its of on or our that the their this to
+we will with you your who what when where which while about across all also any can into more most
+not over per such than them they through under up using very within would years year experience
+strong work working role team looking join including etc based plus""".split())
+
+_YEARS_RE = re.compile(r"(\d{1,2})\s*\+?\s*(?:years|yrs)")
+_LOCATION_RE = re.compile(r"location\s*:\s*([^\n.;()]+)", re.IGNORECASE)
+
+DEFAULTS = {"education": 3, "career_trajectory": 4, "company_relevance": 4,
+            "experience_match": 1, "location_match": 5, "tenure": 5}
+
+
+def candidate_text(candidate: Dict[str, Any]) -> str:
+    """Normalized searchable text of a candidate profile"""
+    return normalize_job_description(" ".join(
+        str(candidate.get(field, "")) for field in ("name", "headline", "profile_text", "snippet")
+    ))
+
+
+def _contains(text: str, term: str) -> bool:
+    """Whole-word/phrase match of a normalized term in normalized text (both space-padded)"""
+    return f" {term} " in text
+
+
+class HeuristicScorer:
+    """Deterministic local scorer for the six rubric dimensions, no LLM calls.
+
+    Every cue is a column of a candidates x terms presence matrix built once
+    per call; each dimension is then a vectorized reduction over its columns.
+    Scores follow the same 1-10 scale and weighted fit_score as the LLM path.
+    """
+
+    def __init__(self, scoring_rubric: Optional[Dict[str, float]] = None):
+        """Initialize with the rubric weights (SCORING_RUBRIC by default)"""
+        self.scoring_rubric = scoring_rubric or get_config()["scoring_rubric"]
+        self.weights = weight_vector(self.scoring_rubric, normalize=False)
+
+    def _job_profile(self, job_description: str, job_requirements: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Skills (with weights), location and years wanted by the job"""
+        requirements = job_requirements or {}
+        normalized_jd = normalize_job_description(job_description)
+
+        skills: Dict[str, float] = {}
+        for skill in requirements.get("preferred_skills") or []:
+            skills[normalize_job_description(str(skill))] = 1.0
+        for skill in requirements.get("required_skills") or []:
+            skills[normalize_job_description(str(skill))] = 2.0
+        skills.pop("", None)
+        if not skills:
+            # No structured requirements: fall back to the JD's most frequent content words
+            words = Counter(w for w in normalized_jd.split()
+                            if len(w) > 2 and w not in STOPWORDS and not w.isdigit())
+            skills = {word: 1.0 for word, _ in words.most_common(15)}
+
+        location = requirements.get("location") or ""
+        if not location:
+            match = _LOCATION_RE.search(job_description or "")
+            location = match.group(1) if match else ""
+        location_parts = [normalize_job_description(part) for part in str(location).split(",")]
+        location_parts = [part for part in location_parts if part and part not in REMOTE_TERMS]
+
+        years = requirements.get("experience_years")
+        if not isinstance(years, (int, float)):
+            found = _YEARS_RE.findall(normalized_jd)
+            years = int(found[0]) if found else 3
+
+        jd_padded = f" {normalized_jd} "
+        return {
+            "skills": skills,
+            "location_parts": location_parts,
+            "years": max(1, years),
+            "jd_remote": any(_contains(jd_padded, term) for term in REMOTE_TERMS),
+            "jd_companies": [c for c in KNOWN_COMPANIES if _contains(jd_padded, c)],
+        }
+
+    def score_matrix(self, job_description: str, candidates: List[Dict[str, Any]],
+                     job_requirements: Optional[Dict[str, Any]] = None) -> Tuple[np.ndarray, List[List[str]]]:
+        """Candidates x SCORE_FIELDS matrix of 1-10 scores, plus the skills each candidate matched"""
+        job = self._job_profile(job_description, job_requirements)
+        skill_terms = list(job["skills"])
+        edu_terms = list(EDUCATION_LEVELS)
+        seniority_terms = list(SENIORITY_LEVELS)
+        location_terms = job["location_parts"]
+        columns = (skill_terms + edu_terms + TOP_SCHOOLS + seniority_terms + PROMOTION_TERMS
+                   + KNOWN_COMPANIES + REMOTE_TERMS + location_terms)
+
+        n = len(candidates)
+        presence = np.zeros((n, len(columns)), dtype=bool)
+        experience_years = np.zeros(n)
+        for i, candidate in enumerate(candidates):
+            text = candidate_text(candidate)
+            padded = f" {text} "
+            presence[i] = [_contains(padded, term) for term in columns]
+            found = _YEARS_RE.findall(text)
+            experience_years[i] = max(map(int, found)) if found else 0
+
+        # Slice the presence matrix into one block per cue group
+        blocks, start = {}, 0
+        for name, terms in (("skills", skill_terms), ("education", edu_terms), ("schools", TOP_SCHOOLS),
+                            ("seniority", seniority_terms), ("promotion", PROMOTION_TERMS),
+                            ("companies", KNOWN_COMPANIES), ("remote", REMOTE_TERMS),
+                            ("location", location_terms)):
+            blocks[name] = presence[:, start:start + len(terms)]
+            start += len(terms)
+
+        scores = np.zeros((n, len(SCORE_FIELDS)))
+
+        skill_weights = np.array([job["skills"][term] for term in skill_terms])
+        coverage = blocks["skills"] @ skill_weights / skill_weights.sum() if len(skill_terms) else np.zeros(n)
+        scores[:, SCORE_FIELDS.index("experience_match")] = 1 + 9 * coverage
+
+        edu_levels = np.array([EDUCATION_LEVELS[term] for term in edu_terms])
+        education = np.where(blocks["education"], edu_levels, 0).max(axis=1, initial=0)
+        education = np.where(education > 0, education, DEFAULTS["education"])
+        scores[:, SCORE_FIELDS.index("education")] = education + 2 * blocks["schools"].any(axis=1)
+
+        seniority_levels = np.array([SENIORITY_LEVELS[term] for term in seniority_terms])
+        seniority = np.where(blocks["seniority"], seniority_levels, 0).max(axis=1, initial=0)
+        seniority = np.where(seniority > 0, seniority, DEFAULTS["career_trajectory"])
+        scores[:, SCORE_FIELDS.index("career_trajectory")] = seniority + blocks["promotion"].any(axis=1)
+
+        jd_company_mask = np.array([c in job["jd_companies"] for c in KNOWN_COMPANIES])
+        named_company = (blocks["companies"] & jd_company_mask).any(axis=1)
+        any_company = blocks["companies"].any(axis=1)
+        scores[:, SCORE_FIELDS.index("company_relevance")] = np.select(
+            [named_company, any_company], [10, 8], DEFAULTS["company_relevance"]
+        )
+
+        location = blocks["location"]
+        city_match = location[:, 0] if location.shape[1] else np.zeros(n, dtype=bool)
+        region_match = location[:, 1:].any(axis=1) if location.shape[1] > 1 else np.zeros(n, dtype=bool)
+        remote = blocks["remote"].any(axis=1) | job["jd_remote"]
+        scores[:, SCORE_FIELDS.index("location_match")] = np.select(
+            [city_match, region_match | remote], [10, 7], DEFAULTS["location_match"]
+        )
+
+        ratio = experience_years / (1.5 * job["years"])
+        scores[:, SCORE_FIELDS.index("tenure")] = np.where(
+            experience_years > 0, 2 + 8 * np.minimum(1.0, ratio), DEFAULTS["tenure"]
+        )
+
+        matched_skills = [[skill_terms[j] for j in np.flatnonzero(row)] for row in blocks["skills"]]
+        return np.clip(np.rint(scores), 1, 10), matched_skills
+
+    def score_candidates(self, job_description: str, candidates: List[Dict[str, Any]],
+                         job_requirements: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Score every candidate locally, returning copies shaped like LLM-scored candidates"""
+        if not candidates:
+            return []
+
+        matrix, matched_skills = self.score_matrix(job_description, candidates, job_requirements)
+        fit_scores = matrix @ self.weights
+
+        scored = []
+        for candidate, row, fit_score, skills in zip(candidates, matrix, fit_scores, matched_skills):
+            scored_candidate = candidate.copy()
+            scored_candidate.update({
+                "fit_score": round(float(fit_score), 2),
+                "score_breakdown": {field: int(value) for field, value in zip(SCORE_FIELDS, row)},
+                "reasoning": ("Heuristic score from profile keywords. Matched skills: "
+                              + (", ".join(skills[:8]) if skills else "none")),
+                "scored_by": "heuristic"
+            })
+            scored.append(scored_candidate)
+        return scored
@@ -0,0 +1,318 @@
+import re
+import time
+import random
+import sqlite3
+import hashlib
+import difflib
+import threading
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+MINHASH_BANDS = 16
+MINHASH_ROWS = 4
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(1)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(MINHASH_BANDS * MINHASH_ROWS)
+]
+
+_TOKEN_RE = re.compile(r"[a-z0-9+#]+(?:[.\-][a-z0-9+#]+)*")
+
+# Requirement fields whose words must not change for a cached result to be reused
+_PROTECTED_FIELDS = ("job_title", "location", "education_level", "experience_years",
+                     "required_skills", "preferred_skills")
+
+# Near-match distance histogram resolution: buckets of 1/_DISTANCE_BUCKETS over [0, 1]
+_DISTANCE_BUCKETS = 100
+
+# Words a new JD must not add for a cached result to be reused: they name a skill or a role
+SKILL_TERMS = frozenset("""python java javascript typescript rust go golang c++ c# scala kotlin swift ruby php
+perl haskell elixir erlang julia matlab sql nosql react angular vue node node.js django flask fastapi spring
+rails pytorch tensorflow jax keras scikit-learn pandas numpy cuda triton kubernetes k8s docker terraform
+ansible aws gcp azure spark hadoop kafka airflow dbt snowflake databricks bigquery postgres postgresql mysql
+mongodb redis elasticsearch graphql grpc llm llms nlp ml ai rag transformers diffusion vision robotics
+embedded firmware fpga linux ios android unity blockchain solidity security""".split())
+TITLE_TERMS = frozenset("""engineer engineers developer developers scientist researcher manager director
+architect analyst designer intern junior senior staff principal lead head vp cto founding frontend backend
+fullstack full-stack devops sre mlops""".split())
+
+# A JD line that states requirements: words added to one change what the job asks for
+_REQUIREMENT_LINE_RE = re.compile(
+    r"\b(required|requirements?|requires?|must|need|needs|qualifications?|proficien\w*|skills?|"
+    r"experience (?:with|in)|knowledge of|familiar\w* with)\b",
+    re.IGNORECASE
+)
+
+
+def normalize_job_description(text: str) -> str:
+    """Canonical form of a JD: case, bullets, punctuation and whitespace folded away"""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    return " ".join(_TOKEN_RE.findall(text))
+
+
+def job_description_key(text: str) -> str:
+    """Exact cache key for a JD, stable across formatting-only edits"""
+    return hashlib.md5(normalize_job_description(text).encode()).hexdigest()
+
+
+def shingles(normalized: str) -> Set[str]:
+    """Word bigrams (or the single word) of a normalized JD"""
+    words = normalized.split()
+    if len(words) < 2:
+        return set(words)
+    return {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    """Jaccard similarity of two shingle sets"""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def minhash_bands(shingle_set: Set[str]) -> List[int]:
+    """LSH band hashes of the MinHash signature, one per band"""
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "big")
+              for s in shingle_set] or [0]
+    signature = [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+    bands = []
+    for i in range(MINHASH_BANDS):
+        rows = signature[i * MINHASH_ROWS:(i + 1) * MINHASH_ROWS]
+        digest = hashlib.blake2b(repr(rows).encode(), digest_size=8).digest()
+        bands.append(int.from_bytes(digest, "big", signed=True))
+    return bands
+
+
+def protected_tokens(job_requirements: Optional[Dict[str, Any]]) -> Set[str]:
+    """Normalized words of the requirement fields a reused result depends on"""
+    tokens = set()
+    for field in _PROTECTED_FIELDS:
+        value = (job_requirements or {}).get(field)
+        values = value if isinstance(value, list) else [value]
+        for item in values:
+            if item is not None:
+                tokens.update(normalize_job_description(str(item)).split())
+    return tokens
+
+
+def requirement_line_tokens(text: str) -> Set[str]:
+    """Normalized words of the lines and sentences of a raw JD that state requirements"""
+    tokens = set()
+    for line in re.split(r"[\n;•]|(?<=[.!?])\s", text or ""):
+        if _REQUIREMENT_LINE_RE.search(line):
+            tokens.update(normalize_job_description(line).split())
+    return tokens
+
+
+def diff_tokens(old: str, new: str) -> Tuple[Set[str], Set[str]]:
+    """(words inserted, deleted or replaced, words on the new side of those edits) between two normalized JDs"""
+    old_words, new_words = old.split(), new.split()
+    matcher = difflib.SequenceMatcher(a=old_words, b=new_words, autojunk=False)
+    changed, added = set(), set()
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != "equal":
+            changed.update(old_words[i1:i2])
+            added.update(new_words[j1:j2])
+    changed.update(added)
+    return changed, added
+
+
+class JDIndex:
+    """MinHash LSH index of cached job descriptions for near-duplicate lookup.
+
+    Candidates come from indexed band-hash lookups (16 bands of 4 rows, so
+    pairs at Jaccard 0.8 collide with probability > 0.999). Each candidate is
+    then verified by exact shingle Jaccard, and rejected if the edit touches a
+    number or a word of the cached JD's extracted requirements, or adds a
+    skill or role word or a word of one of the new JD's requirement lines. So
+    a JD that changes location or years of experience, or adds a required
+    skill, is never served the old result.
+    """
+
+    def __init__(self, db_path: str, ttl_seconds: float, min_similarity: float = 0.8):
+        """Initialize the index; the tables are created on first use"""
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.min_similarity = min_similarity
+
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+        self._stats_lock = threading.Lock()
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.rejected = 0
+        self.misses = 0
+        # Near-match distances as a fixed 0.01-wide histogram plus running sum and max, so memory stays bounded
+        self.distance_histogram = [0] * (_DISTANCE_BUCKETS + 1)
+        self.distance_sum = 0.0
+        self.distance_max: Optional[float] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, creating the tables if needed"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+
+        if not self._schema_ready:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    conn.execute("""
+                        CREATE TABLE IF NOT EXISTS jd_index (
+                            key TEXT PRIMARY KEY,
+                            normalized TEXT NOT NULL,
+                            protected TEXT NOT NULL,
+                            expires_at REAL NOT NULL
+                        )""")
+                    conn.execute("""
+                        CREATE TABLE IF NOT EXISTS jd_bands (
+                            band INTEGER NOT NULL,
+                            hash INTEGER NOT NULL,
+                            key TEXT NOT NULL,
+                            PRIMARY KEY (band, hash, key)
+                        )""")
+                    conn.execute("CREATE INDEX IF NOT EXISTS idx_jd_bands_key ON jd_bands (key)")
+                    conn.execute("CREATE INDEX IF NOT EXISTS idx_jd_index_expires ON jd_index (expires_at)")
+                    self._schema_ready = True
+        return conn
+
+    def add(self, key: str, normalized: str, protected: Iterable[str], ttl_seconds: Optional[float] = None):
+        """Index a cached JD under its result cache key"""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        bands = minhash_bands(shingles(normalized))
+        try:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO jd_index (key, normalized, protected, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, normalized, " ".join(sorted(set(protected))), time.time() + ttl)
+                )
+                conn.execute("DELETE FROM jd_bands WHERE key = ?", (key,))
+                conn.executemany(
+                    "INSERT OR IGNORE INTO jd_bands (band, hash, key) VALUES (?, ?, ?)",
+                    [(i, band_hash, key) for i, band_hash in enumerate(bands)]
+                )
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            print(f"JD index write failed: {e}")
+
+    def find_similar(self, normalized: str, exclude: Optional[str] = None, variant: str = "",
+                     requirement_tokens: Optional[Set[str]] = None) -> Optional[Tuple[str, float]]:
+        """Most similar reusable cached JD as (key, jaccard_distance), or None.
+
+        Only keys whose ":"-suffix equals variant (the scoring mode) are
+        considered. requirement_tokens are the words of the new JD's
+        requirement lines (see requirement_line_tokens).
+        """
+        guarded_additions = SKILL_TERMS | TITLE_TERMS | (requirement_tokens or set())
+        shingle_set = shingles(normalized)
+        bands = minhash_bands(shingle_set)
+        where = " OR ".join("(band = ? AND hash = ?)" for _ in bands)
+        params = [value for pair in enumerate(bands) for value in pair]
+        try:
+            rows = self._connect().execute(
+                f"""SELECT key, normalized, protected FROM jd_index
+                    WHERE expires_at > ? AND key IN (SELECT key FROM jd_bands WHERE {where})""",
+                (time.time(), *params)
+            ).fetchall()
+        except sqlite3.Error as e:
+            print(f"JD index read failed: {e}")
+            return None
+
+        best = None
+        rejected = False
+        for key, cached, protected in rows:
+            if key == exclude or key.partition(":")[2] != variant:
+                continue
+            similarity = jaccard(shingle_set, shingles(cached))
+            if similarity < self.min_similarity:
+                continue
+
+            changed, added = diff_tokens(cached, normalized)
+            if (changed & set(protected.split()) or added & guarded_additions
+                    or any(ch.isdigit() for token in changed for ch in token)):
+                rejected = True
+                continue
+            if best is None or similarity > best[1]:
+                best = (key, similarity)
+
+        if best is None:
+            if rejected:
+                with self._stats_lock:
+                    self.rejected += 1
+            return None
+        return best[0], round(1 - best[1], 4)
+
+    def record_lookup(self, distance: Optional[float]):
+        """Count a lookup: distance 0 is an exact hit, None a miss"""
+        with self._stats_lock:
+            if distance is None:
+                self.misses += 1
+            elif distance == 0:
+                self.exact_hits += 1
+            else:
+                self.near_hits += 1
+                self.distance_histogram[min(_DISTANCE_BUCKETS, max(0, round(distance * _DISTANCE_BUCKETS)))] += 1
+                self.distance_sum += distance
+                self.distance_max = distance if self.distance_max is None else max(self.distance_max, distance)
+
+    def purge_expired(self) -> int:
+        """Delete expired entries and return how many were removed"""
+        try:
+            conn = self._connect()
+            now = time.time()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "DELETE FROM jd_bands WHERE key IN (SELECT key FROM jd_index WHERE expires_at <= ?)", (now,)
+                )
+                removed = conn.execute("DELETE FROM jd_index WHERE expires_at <= ?", (now,)).rowcount
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+            return removed
+        except sqlite3.Error as e:
+            print(f"JD index purge failed: {e}")
+            return 0
+
+    def checkpoint(self):
+        """Nothing extra to do; the result store shares this database and checkpoints it"""
+
+    def clear(self):
+        """Remove every indexed JD"""
+        try:
+            conn = self._connect()
+            conn.execute("DELETE FROM jd_bands")
+            conn.execute("DELETE FROM jd_index")
+        except sqlite3.Error as e:
+            print(f"JD index clear failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Exact/near-duplicate hit counts and the Jaccard distance of near matches"""
+        with self._stats_lock:
+            lookups = self.exact_hits + self.near_hits + self.misses
+            return {
+                "min_similarity": self.min_similarity,
+                "lookups": lookups,
+                "exact_hits": self.exact_hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "rejected_near_matches": self.rejected,
+                "hit_rate": round((self.exact_hits + self.near_hits) / lookups, 3) if lookups else 0.0,
+                "average_near_distance": round(self.distance_sum / self.near_hits, 4) if self.near_hits else None,
+                "max_near_distance": self.distance_max,
+                "near_distance_histogram": {
+                    round(bucket / _DISTANCE_BUCKETS, 2): count
+                    for bucket, count in enumerate(self.distance_histogram) if count
+                }
+            }
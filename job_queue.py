@@ -0,0 +1,256 @@
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+JOB_STATUSES = ("queued", "running", "completed", "failed")
+
+# runner(payload, progress) -> result dict; a result with an 'error' key marks the job failed
+JobRunner = Callable[[Dict[str, Any], Callable[[Dict[str, Any]], None]], Dict[str, Any]]
+
+
+class JobQueue:
+    """Persistent job queue backed by SQLite with a pool of worker threads.
+
+    Jobs survive restarts and can be submitted and polled from several
+    processes sharing the database. Running jobs hold a lease that a
+    heartbeat renews while the runner is alive; a job whose lease lapses (its
+    worker died) is put back in the queue, or failed once it has been
+    attempted max_attempts times.
+    """
+
+    def __init__(self, db_path: str, runner: JobRunner, workers: int = 2,
+                 lease_seconds: float = 900, retention_seconds: float = 86400,
+                 poll_interval: float = 1.0, max_attempts: int = 3):
+        """Initialize the queue; call start() to launch the workers"""
+        self.db_path = db_path
+        self.runner = runner
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retention_seconds = retention_seconds
+        self.poll_interval = poll_interval
+
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+        self._wakeup = threading.Condition()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, creating the table if needed"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+
+        if not self._schema_ready:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    conn.execute("""
+                        CREATE TABLE IF NOT EXISTS jobs (
+                            id TEXT PRIMARY KEY,
+                            status TEXT NOT NULL,
+                            payload TEXT NOT NULL,
+                            progress TEXT,
+                            result TEXT,
+                            error TEXT,
+                            attempts INTEGER NOT NULL DEFAULT 0,
+                            created_at REAL NOT NULL,
+                            started_at REAL,
+                            finished_at REAL,
+                            lease_expires_at REAL
+                        )""")
+                    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+                    self._schema_ready = True
+        return conn
+
+    def start(self):
+        """Launch the worker threads"""
+        self._stop.clear()
+        for i in range(self.workers - len([t for t in self._threads if t.is_alive()])):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        """Stop taking new jobs; running jobs are reclaimed after their lease if cut short"""
+        self._stop.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = [t for t in self._threads if t.is_alive()]
+
+    def submit(self, payload: Dict[str, Any]) -> str:
+        """Queue a job and return its id"""
+        job_id = uuid.uuid4().hex
+        self._connect().execute(
+            "INSERT INTO jobs (id, status, payload, created_at) VALUES (?, 'queued', ?, ?)",
+            (job_id, json.dumps(payload), time.time())
+        )
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Status, progress and timing of a job (without its result)"""
+        row = self._connect().execute(
+            """SELECT id, status, progress, error, attempts, created_at, started_at, finished_at
+               FROM jobs WHERE id = ?""", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        job = {
+            "job_id": row[0],
+            "status": row[1],
+            "progress": json.loads(row[2]) if row[2] else None,
+            "error": row[3],
+            "attempts": row[4],
+            "created_at": row[5],
+            "started_at": row[6],
+            "finished_at": row[7]
+        }
+        if row[1] == "queued":
+            job["queue_position"] = self._connect().execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND created_at <= ?", (row[5],)
+            ).fetchone()[0]
+        return job
+
+    def get_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """The stored result of a finished job, or None"""
+        row = self._connect().execute("SELECT result FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def _claim(self) -> Optional[Dict[str, Any]]:
+        """Atomically move the oldest queued (or abandoned) job to running.
+
+        Abandoned jobs that already used all their attempts are failed instead.
+        """
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                """UPDATE jobs SET status = 'failed', error = ?, finished_at = ?, lease_expires_at = NULL
+                   WHERE status = 'running' AND lease_expires_at < ? AND attempts >= ?""",
+                (f"Job abandoned by its worker after {self.max_attempts} attempts", now, now, self.max_attempts)
+            )
+            row = conn.execute(
+                """SELECT id, payload FROM jobs
+                   WHERE status = 'queued' OR (status = 'running' AND lease_expires_at < ?)
+                   ORDER BY created_at LIMIT 1""", (now,)
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    """UPDATE jobs SET status = 'running', started_at = ?, lease_expires_at = ?,
+                       attempts = attempts + 1 WHERE id = ?""",
+                    (now, now + self.lease_seconds, row[0])
+                )
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        return {"id": row[0], "payload": json.loads(row[1])} if row else None
+
+    def _renew_lease(self, job_id: str):
+        """Extend a running job's lease"""
+        try:
+            self._connect().execute(
+                "UPDATE jobs SET lease_expires_at = ? WHERE id = ? AND status = 'running'",
+                (time.time() + self.lease_seconds, job_id)
+            )
+        except sqlite3.Error as e:
+            print(f"Job lease renewal failed for {job_id}: {e}")
+
+    def _heartbeat(self, job_id: str, done: threading.Event):
+        """Renew the job's lease a few times per lease period until done is set"""
+        while not done.wait(self.lease_seconds / 3):
+            self._renew_lease(job_id)
+
+    def _update_progress(self, job_id: str, progress: Dict[str, Any]):
+        """Record progress and renew the job's lease"""
+        try:
+            self._connect().execute(
+                "UPDATE jobs SET progress = ?, lease_expires_at = ? WHERE id = ? AND status = 'running'",
+                (json.dumps(progress, default=str), time.time() + self.lease_seconds, job_id)
+            )
+        except sqlite3.Error as e:
+            print(f"Job progress update failed for {job_id}: {e}")
+
+    def _finish(self, job_id: str, result: Optional[Dict[str, Any]], error: Optional[str]):
+        self._connect().execute(
+            """UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, lease_expires_at = NULL
+               WHERE id = ?""",
+            ("failed" if error else "completed",
+             json.dumps(result, default=str) if result is not None else None,
+             error, time.time(), job_id)
+        )
+
+    def _work(self):
+        while not self._stop.is_set():
+            try:
+                job = self._claim()
+            except sqlite3.Error as e:
+                print(f"Job queue claim failed: {e}")
+                job = None
+
+            if job is None:
+                # Submissions from this process wake us; other processes are picked up by polling
+                with self._wakeup:
+                    self._wakeup.wait(self.poll_interval)
+                continue
+
+            job_id = job["id"]
+            print(f"🛠️ Job {job_id} started")
+            # Long steps report no progress, so the lease is kept alive by a timer rather than by updates
+            done = threading.Event()
+            heartbeat = threading.Thread(target=self._heartbeat, args=(job_id, done),
+                                         name=f"job-heartbeat-{job_id[:8]}", daemon=True)
+            heartbeat.start()
+            try:
+                result = self.runner(job["payload"], lambda progress: self._update_progress(job_id, progress))
+                error = result.get("error") if isinstance(result, dict) else None
+            except Exception as e:
+                result, error = None, str(e)
+            finally:
+                done.set()
+                heartbeat.join()
+
+            try:
+                self._finish(job_id, result, error)
+            except sqlite3.Error as e:
+                print(f"Job queue could not record result for {job_id}: {e}")
+            print(f"🛠️ Job {job_id} {'failed: ' + error if error else 'completed'}")
+
+    def purge_expired(self) -> int:
+        """Delete finished jobs older than the retention period"""
+        try:
+            return self._connect().execute(
+                "DELETE FROM jobs WHERE status IN ('completed', 'failed') AND finished_at <= ?",
+                (time.time() - self.retention_seconds,)
+            ).rowcount
+        except sqlite3.Error as e:
+            print(f"Job purge failed: {e}")
+            return 0
+
+    def checkpoint(self):
+        """Fold the WAL back into the main database file"""
+        try:
+            self._connect().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except sqlite3.Error as e:
+            print(f"Job queue checkpoint failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Job counts by status and the worker pool size"""
+        counts = dict(self._connect().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {
+            "workers": self.workers,
+            **{status: counts.get(status, 0) for status in JOB_STATUSES}
+        }
@@ -4,18 +4,38 @@ AI-Powered Recruitment Sourcing Agent
 Main orchestrator script for the recruitment pipeline
 """
 
+import os
 import json
 import time
 import asyncio
-from typing import Dict, Any, List, Optional
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple, Callable
 from datetime import datetime, timedelta
 
 from config import get_config, validate_config
+from cache_store import SQLiteCache, MemoryCache, TieredCache, CacheCompactor
+from singleflight import SingleFlight
+from scheduler import PrioritySemaphore, BatchScheduler
+from jd_index import (JDIndex, job_description_key, normalize_job_description, protected_tokens,
+                      requirement_line_tokens)
+from prefilter import prefilter_candidates
+from score_matrix import SCORE_FIELDS, ScoreMatrix, weight_vector
 from groq_utils import GroqClient
 from search import LinkedInSearcher
 from score import CandidateScorer
 from message import MessageGenerator
 
+ProgressCallback = Callable[[Dict[str, Any]], None]
+# Picks the profiles to score from every fetched profile (called on the fetch thread)
+ProfileSelector = Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]
+
+# Fields MessageGenerator adds to a candidate
+MESSAGE_FIELDS = ('message', 'message_generated', 'fallback_message')
+
+# Score matrices kept in memory for repeated re-ranking of the same result
+SCORE_MATRIX_CACHE_SIZE = 16
+
 class SourcingAgent:
     def __init__(self):
         """Initialize the sourcing agent with all components"""
@@ -33,79 +53,238 @@ class SourcingAgent:
         
         # Cache management
         self.cache_file = self.config["cache_file"]
-        self.cache = self._load_cache()
+        cache_ttl = self.config["cache_expiry_hours"] * 3600
+        self.cache = TieredCache(
+            MemoryCache(self.config["result_memory_cache_max_bytes"], ttl_seconds=cache_ttl),
+            SQLiteCache(self.cache_file, "results", ttl_seconds=cache_ttl)
+        )
+        # Per-stage, per-unit checkpoints so an interrupted run resumes where it stopped
+        self.checkpoints = SQLiteCache(
+            self.cache_file,
+            "checkpoints",
+            ttl_seconds=self.config["checkpoint_ttl_hours"] * 3600,
+            compress=True
+        ) if self.config["checkpoint_enabled"] else None
+        self.jd_index = JDIndex(
+            self.cache_file,
+            ttl_seconds=cache_ttl,
+            min_similarity=self.config["jd_near_duplicate_min_similarity"]
+        ) if self.config["jd_near_duplicate_enabled"] else None
+        if os.path.exists(self.config["legacy_cache_file"]):
+            threading.Thread(target=self._import_legacy_cache, name="legacy-cache-import", daemon=True).start()
+        
+        # Expired entries are purged in the background rather than at startup
+        caches = [self.cache, self.checkpoints, self.jd_index, self.groq_client.response_cache,
+                  self.searcher.profile_cache, self.searcher.search_cache]
+        self.cache_compactor = CacheCompactor(
+            [cache for cache in caches if cache is not None],
+            interval_seconds=self.config["cache_compact_interval_minutes"] * 60
+        )
+        self.cache_compactor.start()
+        
+        # Identical concurrent async requests share one pipeline run
+        self.in_flight = SingleFlight()
+        
+        self._score_matrices: "OrderedDict[Tuple[str, Any], ScoreMatrix]" = OrderedDict()
+        self._score_matrices_lock = threading.Lock()
+    
+    def close(self):
+        """Stop background cache maintenance"""
+        self.cache_compactor.stop()
     
-    def _load_cache(self) -> Dict[str, Any]:
-        """Load cache from file"""
+    def _import_legacy_cache(self):
+        """Move unexpired entries from the old cache.json into the result store, once"""
+        legacy_file = self.config["legacy_cache_file"]
+        if not os.path.exists(legacy_file):
+            return
+        
         try:
-            with open(self.cache_file, 'r') as f:
+            with open(legacy_file, 'r') as f:
                 cache_data = json.load(f)
-                
-                # Clean expired entries
-                current_time = datetime.now()
-                expiry_hours = self.config["cache_expiry_hours"]
-                
-                valid_cache = {}
-                for key, entry in cache_data.items():
-                    if 'timestamp' in entry:
-                        entry_time = datetime.fromisoformat(entry['timestamp'])
-                        if current_time - entry_time < timedelta(hours=expiry_hours):
-                            valid_cache[key] = entry
-                
-                return valid_cache
-        except (FileNotFoundError, json.JSONDecodeError):
-            return {}
-    
-    def _save_cache(self):
-        """Save cache to file"""
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Skipping legacy cache import: {e}")
+            return
+        
+        # Keep each entry's remaining lifetime rather than restarting its TTL
+        current_time = datetime.now()
+        expiry = timedelta(hours=self.config["cache_expiry_hours"])
+        imported = 0
+        for entry in cache_data.values():
+            if 'timestamp' not in entry or 'result' not in entry:
+                continue
+            remaining = expiry - (current_time - datetime.fromisoformat(entry['timestamp']))
+            job_description = entry['result'].get('job_description', '')
+            key = self._get_cache_key(job_description)
+            if remaining.total_seconds() > 0 and job_description and key not in self.cache:
+                self._store_result(key, entry['result'], ttl_seconds=remaining.total_seconds())
+                imported += 1
+        
         try:
-            with open(self.cache_file, 'w') as f:
-                json.dump(self.cache, f, indent=2, default=str)
-        except Exception as e:
-            print(f"Failed to save cache: {e}")
+            os.replace(legacy_file, legacy_file + ".imported")
+        except OSError as e:
+            print(f"Could not rename legacy cache file: {e}")
+        print(f"📦 Imported {imported} cached results from {legacy_file}")
+    
+    def _get_cache_key(self, job_description: str, scoring_mode: str = "standard") -> str:
+        """Generate cache key for job description (formatting-insensitive), one per scoring mode"""
+        key = job_description_key(job_description)
+        return key if scoring_mode == "standard" else f"{key}:{scoring_mode}"
+    
+    def _get_cached_result(self, job_description: str, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Exact cache hit, else the result of a near-duplicate cached JD scored the same way"""
+        cached_result = self.cache.get(cache_key)
+        if self.jd_index is None:
+            return cached_result
+        if cached_result is not None:
+            self.jd_index.record_lookup(0)
+            return cached_result
+        
+        match = self.jd_index.find_similar(
+            normalize_job_description(job_description), exclude=cache_key, variant=cache_key.partition(":")[2],
+            requirement_tokens=requirement_line_tokens(job_description)
+        )
+        if match is not None:
+            matched_key, distance = match
+            cached_result = self.cache.get(matched_key)
+            if cached_result is not None:
+                print(f"📂 Reusing results of a near-duplicate job description (distance {distance})")
+                cached_result['cache_match'] = {
+                    'matched_key': matched_key,
+                    'distance': distance,
+                    'matched_job_description': cached_result['job_description']
+                }
+                cached_result['job_description'] = job_description
+                self.jd_index.record_lookup(distance)
+                return cached_result
+        
+        self.jd_index.record_lookup(None)
+        return None
+    
+    def _load_checkpoint(self, job_key: str, stage: str, unit: str = "") -> Any:
+        """Saved output of one unit of work for this job, or None"""
+        if self.checkpoints is None:
+            return None
+        return self.checkpoints.get(SQLiteCache.make_key(job_key, stage, unit))
+    
+    def _load_checkpoints(self, job_key: str, stage: str, units: List[str]) -> Dict[str, Any]:
+        """Saved outputs of several units of one stage, as {unit: output}, read in one query"""
+        if self.checkpoints is None or not units:
+            return {}
+        keys = {SQLiteCache.make_key(job_key, stage, unit): unit for unit in units}
+        return {keys[key]: value for key, value in self.checkpoints.get_many(list(keys)).items()}
     
-    def _get_cache_key(self, job_description: str) -> str:
-        """Generate cache key for job description"""
-        import hashlib
-        return hashlib.md5(job_description.encode()).hexdigest()
+    def _save_checkpoint(self, job_key: str, stage: str, value: Any, unit: str = ""):
+        """Record the output of one unit of work for this job"""
+        if self.checkpoints is not None:
+            self.checkpoints.set(SQLiteCache.make_key(job_key, stage, unit), value)
     
-    def _is_cached(self, cache_key: str) -> bool:
-        """Check if results are cached and valid"""
-        return cache_key in self.cache
+    def _store_result(self, cache_key: str, result: Dict[str, Any], ttl_seconds: Optional[float] = None):
+        """Cache a pipeline result and index its JD for near-duplicate lookups"""
+        self.cache.set(cache_key, result, ttl_seconds)
+        if self.jd_index is not None:
+            self.jd_index.add(
+                cache_key,
+                normalize_job_description(result['job_description']),
+                protected_tokens(result.get('job_requirements')),
+                ttl_seconds
+            )
     
-    def run_pipeline(self, job_description: str, use_cache: bool = False, top_candidates: int = 10) -> Dict[str, Any]:
+    def run_pipeline(self, job_description: str, use_cache: bool = False, top_candidates: int = 10,
+                     progress: Optional[ProgressCallback] = None, scoring_mode: Optional[str] = None) -> Dict[str, Any]:
         """Run the complete sourcing pipeline"""
+        return asyncio.run(self._run_pipeline_in_new_loop(
+            job_description, use_cache, top_candidates, progress, scoring_mode
+        ))
+
+    async def _run_pipeline_in_new_loop(self, job_description: str, use_cache: bool, top_candidates: int,
+                                        progress: Optional[ProgressCallback] = None,
+                                        scoring_mode: Optional[str] = None) -> Dict[str, Any]:
+        """Run the pipeline on a fresh event loop and release its pooled connections afterwards"""
+        try:
+            return await self._run_pipeline(job_description, use_cache, top_candidates, progress,
+                                            scoring_mode=scoring_mode)
+        finally:
+            await self.groq_client.aclose()
+
+    @staticmethod
+    def _report(progress: Optional[ProgressCallback], stage: str, **details):
+        """Send a progress update to the caller's callback, if any"""
+        if progress is None:
+            return
+        try:
+            progress({'stage': stage, **details})
+        except Exception as e:
+            print(f"Progress callback failed: {e}")
+
+    async def _run_pipeline(self, job_description: str, use_cache: bool, top_candidates: int,
+                            progress: Optional[ProgressCallback] = None,
+                            llm_slots: Optional[PrioritySemaphore] = None,
+                            scoring_mode: Optional[str] = None) -> Dict[str, Any]:
+        """Pipeline implementation shared by the sync and async entry points.
+
+        progress, if given, is called with {'stage': ..., ...} as the run advances.
+        llm_slots, if given, replaces this run's own scoring and messaging
+        concurrency limits with slots shared across a batch.
+        scoring_mode is "standard", "cascade" or "fast" (SCORING_MODE by default).
+        """
         start_time = time.time()
+        scoring_mode = scoring_mode or self.config["scoring_mode"]
         
         print("="*60)
         print("🚀 Starting AI Sourcing Agent Pipeline")
         print("="*60)
         print(f"Job Description: {job_description[:100]}...")
         print(f"Target Candidates: {top_candidates}")
+        print(f"Scoring Mode: {scoring_mode}")
         print()
         
         # Check cache
-        cache_key = self._get_cache_key(job_description)
-        if use_cache and self._is_cached(cache_key):
+        cache_key = self._get_cache_key(job_description, scoring_mode)
+        # Cache and JD index lookups are blocking SQLite reads, so they run off the event loop
+        cached_result = await asyncio.to_thread(self._get_cached_result, job_description, cache_key) if use_cache else None
+        if cached_result is not None:
+            cached_result = await self._resize_cached_result(job_description, cached_result, top_candidates, cache_key)
+        if cached_result is not None:
             print("📂 Found cached results, returning cached data...")
-            cached_result = self.cache[cache_key]['result']
             cached_result['from_cache'] = True
             return cached_result
         
+        # Checkpoints of an earlier, interrupted run are only reused when caching is allowed
+        resume_key = cache_key if use_cache else None
+        
         try:
             # Step 1: Extract job requirements
             print("📋 Step 1: Analyzing job description...")
-            job_requirements = self.groq_client.extract_job_requirements(job_description)
+            self._report(progress, 'analyzing')
+            # Checkpoints are SQLite reads and writes, so they run off the event loop
+            job_requirements = (await asyncio.to_thread(self._load_checkpoint, cache_key, 'requirements')
+                                if resume_key else None)
+            if job_requirements is None:
+                job_requirements = await self.groq_client.aextract_job_requirements(job_description)
+                if job_requirements:
+                    await asyncio.to_thread(self._save_checkpoint, cache_key, 'requirements', job_requirements)
             if job_requirements:
                 print(f"   ✓ Extracted requirements: {job_requirements.get('title', 'N/A')}")
             else:
                 print("   ⚠ Failed to extract structured requirements, using fallback")
             
-            # Step 2: Search for candidates
+            # Step 2: Search for candidate profile URLs
             print("\n🔍 Step 2: Searching for LinkedIn candidates...")
-            candidates = self.searcher.search_candidates(job_description, job_requirements or {})
+            self._report(progress, 'searching')
+            # Search providers are blocking I/O, so they run in the default executor
+            urls = await asyncio.to_thread(self._load_checkpoint, cache_key, 'urls') if resume_key else None
+            if urls is None:
+                loop = asyncio.get_running_loop()
+                urls = await loop.run_in_executor(
+                    None,
+                    self.searcher.find_profile_urls,
+                    job_description,
+                    job_requirements or {}
+                )
+                if urls:
+                    await asyncio.to_thread(self._save_checkpoint, cache_key, 'urls', urls)
             
-            if not candidates:
+            if not urls:
                 return {
                     'error': 'No candidates found',
                     'job_description': job_description,
@@ -113,19 +292,39 @@ class SourcingAgent:
                     'processing_time': time.time() - start_time
                 }
             
-            print(f"   ✓ Found {len(candidates)} potential candidates")
+            print(f"   ✓ Found {len(urls)} potential candidates")
             
-            # Step 3: Score candidates
-            print("\n📊 Step 3: Scoring candidates using AI...")
-            scored_candidates = self.scorer.score_candidates_batch(job_description, candidates)
+            # Step 2b: with more candidates than LLM scoring should see, keep the lexically best
+            # (ranked on the fetch thread of step 3, once every profile is in)
+            score_urls, select, prefilter_stats = await self._prefilter(
+                job_description, urls, job_requirements, top_candidates, scoring_mode, cache_key,
+                resume_key is not None, progress
+            )
             
-            # Step 4: Generate messages for top candidates
-            print(f"\n✉️ Step 4: Generating personalized messages...")
-            top_scored = self.scorer.get_top_candidates(scored_candidates, top_candidates)
-            final_candidates = self.message_generator.generate_messages_batch(job_description, top_scored)
+            # Steps 3-4: Fetch, score and message as a stream. Profiles are scored as soon as they
+            # are extracted, and messages start for candidates that are certain to make the top N.
+            print("\n📊 Steps 3-4: Fetching, scoring and messaging candidates as they arrive...")
+            self._report(progress, 'scoring', scored=0, total=len(score_urls))
+            scored_candidates, final_candidates = await self._stream_candidates(
+                job_description, score_urls, top_candidates, progress, llm_slots,
+                job_key=cache_key, resume=resume_key is not None,
+                scoring_mode=scoring_mode, job_requirements=job_requirements, select=select
+            )
+            candidates = scored_candidates
+            # Kept so a later request for a different top N can be served without rescoring
+            await asyncio.to_thread(self._save_checkpoint, cache_key, 'scored', scored_candidates)
+            
+            if not candidates:
+                return {
+                    'error': 'No candidates found',
+                    'job_description': job_description,
+                    'timestamp': datetime.now().isoformat(),
+                    'processing_time': time.time() - start_time
+                }
             
             # Step 5: Compile results
             print("\n📈 Step 5: Compiling results...")
+            self._report(progress, 'compiling')
             
             scoring_summary = self.scorer.get_scoring_summary(scored_candidates)
             message_stats = self.message_generator.get_message_statistics(final_candidates)
@@ -134,8 +333,10 @@ class SourcingAgent:
                 'job_description': job_description,
                 'job_requirements': job_requirements,
                 'top_candidates': final_candidates,
-                'total_candidates_found': len(candidates),
+                'total_candidates_found': len(urls),
                 'total_candidates_scored': len(scored_candidates),
+                'scoring_mode': scoring_mode,
+                'prefilter': prefilter_stats,
                 'scoring_summary': scoring_summary,
                 'message_statistics': message_stats,
                 'timestamp': datetime.now().isoformat(),
@@ -144,11 +345,7 @@ class SourcingAgent:
             }
             
             # Cache the result
-            self.cache[cache_key] = {
-                'result': result,
-                'timestamp': datetime.now().isoformat()
-            }
-            self._save_cache()
+            await asyncio.to_thread(self._store_result, cache_key, result)
             
             # Print summary
             self._print_summary(result)
@@ -165,6 +362,320 @@ class SourcingAgent:
             print(f"\n❌ Pipeline failed: {e}")
             return error_result
     
+    async def _prefilter(self, job_description: str, urls: List[str], job_requirements: Optional[Dict[str, Any]],
+                         top_candidates: int, scoring_mode: str, job_key: str, resume: bool,
+                         progress: Optional[ProgressCallback] = None
+                         ) -> Tuple[List[str], Optional[ProfileSelector], Optional[Dict[str, Any]]]:
+        """Plan narrowing the URLs sent to LLM scoring to the PREFILTER_TOP_K most relevant profiles.
+
+        Returns (URLs to stream, selector or None, stats or None when no
+        prefilter applies). Ranking needs every profile's text, so the
+        selector runs on the fetch thread of _stream_candidates once all of
+        urls are fetched, and the kept profiles stream into scoring, best
+        first, as soon as ranking finishes. A resumed run reuses the kept URLs
+        of its checkpoint and fetches only those.
+        """
+        keep = max(self.config["prefilter_top_k"], top_candidates)
+        if not self.config["prefilter_enabled"] or scoring_mode == "fast" or len(urls) <= keep:
+            # Fast mode already scores everyone locally
+            return urls, None, None
+        
+        method = self.config["prefilter_method"]
+        stats = {'method': method, 'candidates': len(urls), 'kept': None}
+        kept_urls = await asyncio.to_thread(self._load_checkpoint, job_key, 'prefilter') if resume else None
+        if kept_urls is not None:
+            print(f"   ✓ Kept {len(kept_urls)} of {len(urls)} candidates for scoring")
+            stats['kept'] = len(kept_urls)
+            return kept_urls, None, stats
+        
+        print(f"\n🧹 Prefiltering {len(urls)} candidates down to {keep} ({method})...")
+        self._report(progress, 'prefiltering', total=len(urls), keep=keep)
+        
+        def select(fetched: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            kept = prefilter_candidates(job_description, fetched, keep, job_requirements, method)
+            self._save_checkpoint(job_key, 'prefilter', [candidate.get('linkedin_url', '') for candidate in kept])
+            stats['kept'] = len(kept)
+            print(f"   ✓ Kept {len(kept)} of {len(urls)} candidates for scoring")
+            return kept
+        
+        return urls, select, stats
+
+    async def _stream_candidates(self, job_description: str, urls: List[str], top_candidates: int,
+                                 progress: Optional[ProgressCallback] = None,
+                                 llm_slots: Optional[PrioritySemaphore] = None,
+                                 job_key: str = "", resume: bool = False,
+                                 scoring_mode: str = "standard",
+                                 job_requirements: Optional[Dict[str, Any]] = None,
+                                 select: Optional[ProfileSelector] = None
+                                 ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Overlap profile fetching, scoring and message generation.
+
+        A fetch thread pushes extracted profiles into a bounded queue, scoring
+        groups are pulled from it while fetching continues, and a candidate's
+        message is started as soon as it is certainly in the top N: fewer
+        than N candidates (scored or still unscored) can outrank it.
+
+        Every successful score and message is checkpointed under job_key; with
+        resume, candidates scored or messaged by an earlier run are reused and
+        only the remaining profiles are fetched.
+
+        In "fast" scoring mode candidates are scored by the local heuristic
+        scorer instead of the LLM; only the top N messages use the LLM. In
+        "cascade" mode messages wait for the rescoring pass, since screening
+        scores can still change.
+
+        select, if given, picks the profiles to score from all of urls (the
+        prefilter): the fetch thread fetches every profile first, then pushes
+        only the selected ones, so scoring starts the moment ranking ends.
+
+        Returns (all scored candidates ranked, top N candidates with messages).
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.config["pipeline_queue_size"])
+
+        stop_producing = threading.Event()
+
+        scored = []
+        if resume:
+            saved = await asyncio.to_thread(self._load_checkpoints, job_key, 'score', urls)
+            scored = [saved[url] for url in urls if url in saved]
+            if scored:
+                print(f"   ↻ Resuming: {len(scored)} of {len(urls)} candidates already scored")
+        already_scored = {candidate.get('linkedin_url') for candidate in scored}
+        pending_urls = [url for url in urls if url not in already_scored]
+        # Candidates this run will score in all; a selector narrows it once ranking is done
+        expected = len(urls)
+
+        def set_expected(count: int):
+            nonlocal expected
+            expected = count
+
+        def produce():
+            try:
+                if select is None:
+                    source = self.searcher.iter_profiles(pending_urls)
+                else:
+                    source = select(self.searcher.fetch_profiles(pending_urls))
+                    # Runs on the loop before the first selected profile is queued
+                    loop.call_soon_threadsafe(set_expected, len(scored) + len(source))
+                for candidate in source:
+                    if stop_producing.is_set():
+                        break
+                    asyncio.run_coroutine_threadsafe(queue.put(candidate), loop).result()
+            finally:
+                asyncio.run_coroutine_threadsafe(queue.put(None), loop).result()
+
+        producer = loop.run_in_executor(None, produce)
+
+        message_tasks = {}
+        messages_done = 0
+        scoring_tasks = set()
+        # Batches pulled from the queue but not yet scored. Once this many are waiting for LLM slots
+        # the loop stops pulling, so the bounded queue fills and the fetch thread blocks.
+        unscored_batches = asyncio.Semaphore(self.config["scoring_max_concurrency"])
+        if llm_slots is None:
+            scoring_slots = PrioritySemaphore(self.config["scoring_max_concurrency"])
+            message_slots = PrioritySemaphore(self.config["batch_size"])
+        else:
+            scoring_slots = message_slots = llm_slots
+
+        def remaining_work() -> int:
+            # Shared slots go to the job with the most work left (lower value = served first)
+            return -((expected - len(scored)) + (top_candidates - messages_done))
+
+        async def generate_message(candidate: Dict[str, Any]) -> Dict[str, Any]:
+            nonlocal messages_done
+            message = await self._checkpointed_message(
+                job_description, candidate, job_key, resume, message_slots, remaining_work
+            )
+            messages_done += 1
+            return message
+
+        def start_certain_messages():
+            if scoring_mode == "cascade":
+                # Screening scores are provisional until the large model rescores, so no message is certain
+                return
+            unscored = max(0, expected - len(scored))
+            for candidate in scored:
+                url = candidate.get('linkedin_url', candidate.get('url', ''))
+                if url in message_tasks:
+                    continue
+                outranked_by = sum(1 for other in scored
+                                   if other is not candidate and other.get('fit_score', 0) >= candidate.get('fit_score', 0))
+                if outranked_by + unscored < top_candidates:
+                    message_tasks[url] = asyncio.create_task(generate_message(candidate))
+
+        async def score_batch(batch: List[Dict[str, Any]]):
+            try:
+                results = []
+                if scoring_mode == "fast":
+                    results = self.scorer.heuristic.score_candidates(job_description, batch, job_requirements)
+                    batch = []
+                # A batch only splits further when its profiles overflow the packed-prompt token budget
+                for group in self.scorer.plan_scoring_batches(job_description, batch):
+                    try:
+                        async with scoring_slots.slot(remaining_work()):
+                            results.extend(await self.scorer.ascore_candidate_group(job_description, group))
+                    except Exception as e:
+                        results.extend(self.scorer.fallback_group(group, e, job_description))
+                for scored_candidate in results:
+                    scored.append(scored_candidate)
+                    if not scored_candidate.get('error'):
+                        await asyncio.to_thread(self._save_checkpoint, job_key, 'score', scored_candidate,
+                                                scored_candidate.get('linkedin_url', ''))
+                    print(f"Scored: {scored_candidate.get('name', 'Unknown')} - Score: {scored_candidate.get('fit_score', 0)}")
+                self._report(progress, 'scoring', scored=len(scored), total=expected)
+                start_certain_messages()
+            finally:
+                unscored_batches.release()
+
+        try:
+            # Resumed candidates may already be certain to make the top N
+            start_certain_messages()
+            finished = False
+            while not finished:
+                # LLM slots are only held around LLM calls, never while waiting on fetches
+                await unscored_batches.acquire()
+                batch, finished = await self._next_scoring_batch(queue)
+                if not batch:
+                    unscored_batches.release()
+                    continue
+                task = asyncio.create_task(score_batch(batch))
+                scoring_tasks.add(task)
+                task.add_done_callback(scoring_tasks.discard)
+
+            await producer
+            if scoring_tasks:
+                await asyncio.gather(*scoring_tasks)
+
+            if scoring_mode == "cascade":
+                # Second tier: the large model re-scores the candidates that decide the top N
+                self._report(progress, 'rescoring')
+                scored[:] = await self.scorer.arescore_cascade(
+                    job_description, scored, top_candidates, scoring_slots, remaining_work
+                )
+
+            # Every candidate is scored now: start messages for the rest of the top N
+            scored.sort(key=lambda x: x.get('fit_score', 0), reverse=True)
+            top_scored = self.scorer.get_top_candidates(scored, top_candidates)
+            top_urls = set()
+            for candidate in top_scored:
+                url = candidate.get('linkedin_url', candidate.get('url', ''))
+                top_urls.add(url)
+                if url not in message_tasks:
+                    message_tasks[url] = asyncio.create_task(generate_message(candidate))
+
+            with_messages = {}
+            for url, task in message_tasks.items():
+                if url in top_urls:
+                    with_messages[url] = await task
+                else:
+                    # Started early but the final ranking left this candidate out of the top N
+                    task.cancel()
+            final_candidates = [
+                self._with_message(candidate, with_messages.get(candidate.get('linkedin_url', candidate.get('url', ''))))
+                for candidate in top_scored
+            ]
+            return scored, final_candidates
+        finally:
+            for task in list(scoring_tasks) + list(message_tasks.values()):
+                task.cancel()
+            # Unblock the fetch thread if we are bailing out early
+            stop_producing.set()
+            while not queue.empty():
+                queue.get_nowait()
+
+    @staticmethod
+    def _with_message(candidate: Dict[str, Any], message: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Candidate's current scores plus the message fields generated for it"""
+        if message is None:
+            return candidate
+        return dict(candidate, **{field: message[field] for field in MESSAGE_FIELDS if field in message})
+
+    async def _checkpointed_message(self, job_description: str, candidate: Dict[str, Any], job_key: str,
+                                    resume: bool, slots: PrioritySemaphore,
+                                    priority: Callable[[], float] = lambda: 0) -> Dict[str, Any]:
+        """Outreach message for a candidate, reusing this job's checkpoint when resuming"""
+        url = candidate.get('linkedin_url', candidate.get('url', ''))
+        message = await asyncio.to_thread(self._load_checkpoint, job_key, 'message', url) if resume else None
+        if message is None:
+            async with slots.slot(priority()):
+                message = await self.message_generator.agenerate_single_message(job_description, candidate)
+            if not message.get('fallback_message'):
+                await asyncio.to_thread(self._save_checkpoint, job_key, 'message', message, url)
+        return message
+
+    async def _resize_cached_result(self, job_description: str, cached_result: Dict[str, Any],
+                                    top_candidates: int, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Fit a cached result to the requested top N.
+
+        A smaller N is a slice. A larger N is rebuilt from the job's checkpointed
+        scored candidates, generating messages only for candidates that lack one.
+        Returns None when the stages needed are no longer cached.
+        """
+        top = cached_result['top_candidates']
+        if len(top) >= top_candidates or len(top) >= cached_result.get('total_candidates_scored', 0):
+            if len(top) > top_candidates:
+                cached_result['top_candidates'] = top[:top_candidates]
+                cached_result['message_statistics'] = self.message_generator.get_message_statistics(
+                    cached_result['top_candidates']
+                )
+            return cached_result
+        
+        # Near-duplicate hits keep their stages under the matched job's key
+        job_key = cached_result.get('cache_match', {}).get('matched_key') or cache_key
+        scored_candidates = await asyncio.to_thread(self._load_checkpoint, job_key, 'scored')
+        if not scored_candidates:
+            return None
+        
+        print(f"📂 Extending cached results from {len(top)} to {top_candidates} candidates...")
+        messages = PrioritySemaphore(self.config["batch_size"])
+        have_message = {c.get('linkedin_url', c.get('url', '')): c for c in top}
+        final_candidates = []
+        for candidate in self.scorer.get_top_candidates(scored_candidates, top_candidates):
+            url = candidate.get('linkedin_url', candidate.get('url', ''))
+            final_candidates.append(have_message.get(url) or asyncio.create_task(
+                self._checkpointed_message(job_description, candidate, job_key, True, messages)
+            ))
+        final_candidates = [await c if isinstance(c, asyncio.Task) else c for c in final_candidates]
+        
+        result = dict(
+            cached_result,
+            top_candidates=final_candidates,
+            message_statistics=self.message_generator.get_message_statistics(final_candidates),
+            timestamp=datetime.now().isoformat()
+        )
+        if 'cache_match' not in result:
+            await asyncio.to_thread(self._store_result, job_key, result)
+        return result
+
+    async def _next_scoring_batch(self, queue: asyncio.Queue) -> Tuple[List[Dict[str, Any]], bool]:
+        """Collect the next scoring group from the profile queue.
+
+        Waits for one profile, then lingers briefly for more so packed scoring
+        still gets full groups. Returns (group, stream finished).
+        """
+        first = await queue.get()
+        if first is None:
+            return [], True
+
+        batch = [first]
+        max_batch = self.config["scoring_max_batch_size"] if self.config["scoring_pack_candidates"] else 1
+        deadline = time.monotonic() + self.config["pipeline_scoring_linger_seconds"]
+        while len(batch) < max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                candidate = await asyncio.wait_for(queue.get(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            if candidate is None:
+                return batch, True
+            batch.append(candidate)
+
+        return batch, False
+
     def _print_summary(self, result: Dict[str, Any]):
         """Print pipeline execution summary"""
         print("\n" + "="*60)
@@ -194,19 +705,79 @@ class SourcingAgent:
         
         print("\n" + "="*60)
     
-    async def run_pipeline_async(self, job_description: str, use_cache: bool = True, top_candidates: int = 10) -> Dict[str, Any]:
-        """Async version of pipeline for better performance"""
-        # For now, run the sync version in executor
-        # Could be enhanced with true async support
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            None, 
-            self.run_pipeline, 
-            job_description, 
-            use_cache, 
-            top_candidates
+    async def run_pipeline_async(self, job_description: str, use_cache: bool = True, top_candidates: int = 10,
+                                 llm_slots: Optional[PrioritySemaphore] = None,
+                                 scoring_mode: Optional[str] = None) -> Dict[str, Any]:
+        """Async version of pipeline; LLM calls share the caller's event loop.
+        
+        Concurrent calls for the same job, scoring mode, candidate count and
+        use_cache share one run, so a caller that asked for fresh results is
+        never handed a cached one.
+        """
+        scoring_mode = scoring_mode or self.config["scoring_mode"]
+        key = (self._get_cache_key(job_description, scoring_mode), top_candidates, use_cache)
+        return await self.in_flight.do(
+            key, lambda: self._run_pipeline(job_description, use_cache, top_candidates, llm_slots=llm_slots,
+                                            scoring_mode=scoring_mode)
         )
     
+    def _score_matrix(self, job_key: str, result: Dict[str, Any]) -> ScoreMatrix:
+        """Score matrix of every candidate scored for a stored result (its top candidates if the scores expired)"""
+        key = (job_key, result.get('timestamp'))
+        with self._score_matrices_lock:
+            if key in self._score_matrices:
+                self._score_matrices.move_to_end(key)
+                return self._score_matrices[key]
+        
+        matrix = ScoreMatrix(self._load_checkpoint(job_key, 'scored') or result['top_candidates'])
+        with self._score_matrices_lock:
+            self._score_matrices[key] = matrix
+            while len(self._score_matrices) > SCORE_MATRIX_CACHE_SIZE:
+                self._score_matrices.popitem(last=False)
+        return matrix
+    
+    def rerank(self, job_description: str, weights: Dict[str, float], top_candidates: int = 10,
+               scoring_mode: Optional[str] = None) -> Dict[str, Any]:
+        """Re-rank a stored result under new rubric weights, without any LLM calls.
+        
+        weights override SCORING_RUBRIC per criterion and are normalized to sum
+        to 1; invalid weights raise ValueError. Candidates keep the outreach
+        message of the stored result; ones new to the top N have none.
+        """
+        start_time = time.time()
+        scoring_mode = scoring_mode or self.config["scoring_mode"]
+        cache_key = self._get_cache_key(job_description, scoring_mode)
+        result = self._get_cached_result(job_description, cache_key)
+        if result is None:
+            return {
+                'error': 'No stored result for this job description',
+                'job_description': job_description,
+                'timestamp': datetime.now().isoformat()
+            }
+        
+        rubric = {**self.scorer.scoring_rubric, **weights}
+        normalized = weight_vector(rubric)
+        job_key = result.get('cache_match', {}).get('matched_key') or cache_key
+        matrix = self._score_matrix(job_key, result)
+        ranked = matrix.rerank(rubric)
+        
+        messages = {c.get('linkedin_url', c.get('url', '')): c for c in result['top_candidates']}
+        final_candidates = [
+            self._with_message(candidate, messages.get(candidate.get('linkedin_url', candidate.get('url', ''))))
+            for candidate in ranked[:top_candidates]
+        ]
+        return {
+            'job_description': result['job_description'],
+            'weights': dict(zip(SCORE_FIELDS, normalized.round(4).tolist())),
+            'top_candidates': final_candidates,
+            'total_candidates_reranked': len(matrix),
+            'candidates_without_message': sum(1 for c in final_candidates if 'message' not in c),
+            'scoring_summary': self.scorer.get_scoring_summary(ranked),
+            'scored_at': result.get('timestamp'),
+            'timestamp': datetime.now().isoformat(),
+            'processing_time': round(time.time() - start_time, 4)
+        }
+    
     def export_results(self, result: Dict[str, Any], filename: Optional[str] = None) -> str:
         """Export results to JSON file"""
         if not filename:
@@ -225,26 +796,27 @@ class SourcingAgent:
     
     def clear_cache(self):
         """Clear the cache"""
-        self.cache = {}
-        self._save_cache()
+        self.cache.clear()
+        if self.checkpoints is not None:
+            self.checkpoints.clear()
+        if self.jd_index is not None:
+            self.jd_index.clear()
+        with self._score_matrices_lock:
+            self._score_matrices.clear()
         print("🗑️ Cache cleared")
     
     def run_batch_jobs(self, job_descriptions: list, use_cache: bool = True, top_candidates: int = 10) -> list:
-        """Run the sourcing pipeline for multiple jobs in parallel (batch processing)"""
-        import concurrent.futures
-        results = []
-        with concurrent.futures.ThreadPoolExecutor(max_workers=min(5, len(job_descriptions))) as executor:
-            future_to_job = {
-                executor.submit(self.run_pipeline, jd, use_cache, top_candidates): jd
-                for jd in job_descriptions
-            }
-            for future in concurrent.futures.as_completed(future_to_job):
-                try:
-                    result = future.result()
-                    results.append(result)
-                except Exception as e:
-                    results.append({'error': str(e), 'job_description': future_to_job[future]})
-        return results
+        """Run the sourcing pipeline for multiple jobs concurrently (batch processing).
+        
+        Jobs share one event loop, one pool of LLM slots and one profile fetch pool;
+        results are returned in completion order.
+        """
+        scheduler = BatchScheduler(
+            self,
+            max_concurrent_jobs=self.config["batch_max_concurrent_jobs"],
+            llm_concurrency=self.config["batch_llm_concurrency"]
+        )
+        return scheduler.run(job_descriptions, use_cache, top_candidates)
 
 def main():
     """Main function for command line usage"""
@@ -1,3 +1,4 @@
+import asyncio
 import concurrent.futures
 from typing import List, Dict, Any, Optional
 from groq_utils import GroqClient
@@ -42,6 +43,26 @@ class MessageGenerator:
             print(f"Error generating message for {candidate.get('name', 'Unknown')}: {e}")
             return self._create_fallback_message(candidate, job_description or "")
 
+    async def agenerate_single_message(self, job_description: str, candidate: Dict[str, Any]) -> Dict[str, Any]:
+        """Async version of single message generation"""
+        job_description = job_description or ""
+        try:
+            message = await self.agenerate_message(job_description, candidate)
+
+            if message:
+                candidate_result = candidate.copy()
+                candidate_result['message'] = message.strip()
+                candidate_result['message_generated'] = True
+
+                return candidate_result
+            else:
+                print(f"Failed to generate message for: {candidate.get('name', 'there')}")
+                return self._create_fallback_message(candidate, job_description)
+
+        except Exception as e:
+            print(f"Error generating message for {candidate.get('name', 'Unknown')}: {e}")
+            return self._create_fallback_message(candidate, job_description)
+
     def _create_fallback_message(self, candidate: Dict[str, Any], job_description: str) -> Dict[str, Any]:
         """Create fallback message when API fails"""
         job_description = job_description or ""
@@ -98,6 +119,28 @@ Best regards"""
         print(f"Completed message generation for {len(candidates_with_messages)} candidates")
         return candidates_with_messages
 
+    async def agenerate_messages_batch(self, job_description: str, candidates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Async version of batch message generation (concurrent requests on one event loop)"""
+        if not candidates:
+            return []
+
+        print(f"Generating messages for {len(candidates)} candidates...")
+
+        semaphore = asyncio.Semaphore(self.config["batch_size"])
+
+        async def generate(candidate: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.agenerate_single_message(job_description, candidate)
+
+        candidates_with_messages = []
+        for coro in asyncio.as_completed([generate(candidate) for candidate in candidates]):
+            candidate_with_message = await coro
+            candidates_with_messages.append(candidate_with_message)
+            print(f"Generated message for: {candidate_with_message.get('name', 'Unknown')}")
+
+        print(f"Completed message generation for {len(candidates_with_messages)} candidates")
+        return candidates_with_messages
+
     def customize_message_tone(self, message: str, tone: str = "professional") -> str:
         """Customize message tone (professional, casual, enthusiastic)"""
         # This could be enhanced with additional Groq calls for tone adjustment
@@ -153,14 +196,14 @@ Best regards"""
             'messages_within_limit': len([msg for msg in messages if len(msg) <= 300])
         }
     
-    def generate_message(self, job_description: str, candidate: Dict[str, Any]) -> str:
-        """Generate a personalized outreach message for a candidate"""
+    def _build_message_prompt(self, job_description: str, candidate: Dict[str, Any]) -> List[Dict[str, str]]:
+        """Build the chat messages used to write an outreach message"""
         job_description = job_description or ""
         # Truncate inputs to prevent token limits
         job_desc_short = job_description[:1000] if job_description else "No job description available"
         profile_short = candidate.get('profile_text', '')[:800] if candidate.get('profile_text') else "No profile available"
 
-        messages = [
+        return [
             {
                 "role": "system", 
                 "content": """You are an expert recruiter writing personalized LinkedIn outreach messages.
@@ -192,8 +235,19 @@ Write the message now:"""
             }
         ]
 
-        response = self.groq_client.make_request(messages)
+    def generate_message(self, job_description: str, candidate: Dict[str, Any]) -> str:
+        """Generate a personalized outreach message for a candidate"""
+        response = self.groq_client.make_request(self._build_message_prompt(job_description, candidate))
+        return self._clean_message_response(job_description, candidate, response)
 
+    async def agenerate_message(self, job_description: str, candidate: Dict[str, Any]) -> str:
+        """Async version of generate_message"""
+        response = await self.groq_client.amake_request(self._build_message_prompt(job_description, candidate))
+        return self._clean_message_response(job_description, candidate, response)
+
+    def _clean_message_response(self, job_description: str, candidate: Dict[str, Any], response: Optional[str]) -> str:
+        """Clean up a raw message response, falling back to the template on bad output"""
+        job_description = job_description or ""
         if response:
             # Clean up the response - remove common AI response patterns
             message = response.strip()
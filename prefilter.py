@@ -0,0 +1,87 @@
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from heuristic_score import HeuristicScorer, STOPWORDS, candidate_text
+from jd_index import normalize_job_description
+
+PREFILTER_METHODS = ("bm25", "heuristic")
+
+# How many times a requirement term counts in the query relative to a word of the JD text
+_QUERY_FIELD_WEIGHTS = {"required_skills": 3, "preferred_skills": 2, "job_title": 2, "title": 2}
+
+
+def _terms(text: str) -> List[str]:
+    """Content words of normalized text"""
+    return [word for word in text.split() if word not in STOPWORDS and len(word) > 1]
+
+
+class BM25Ranker:
+    """Okapi BM25 ranking of candidate profiles against a job description.
+
+    The query is the JD's content words plus the extracted requirement terms,
+    weighted by how often they occur; documents are the candidates' profile
+    text. Scoring is one term-frequency matrix over the query vocabulary.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """Initialize with the usual BM25 saturation and length-normalization parameters"""
+        self.k1 = k1
+        self.b = b
+
+    def build_query(self, job_description: str,
+                    job_requirements: Optional[Dict[str, Any]] = None) -> Counter:
+        """Weighted query terms for a job"""
+        query = Counter(_terms(normalize_job_description(job_description)))
+        for field, weight in _QUERY_FIELD_WEIGHTS.items():
+            value = (job_requirements or {}).get(field)
+            for item in value if isinstance(value, list) else [value]:
+                if item:
+                    for term in _terms(normalize_job_description(str(item))):
+                        query[term] += weight
+        return query
+
+    def score(self, query: Counter, candidates: List[Dict[str, Any]]) -> np.ndarray:
+        """BM25 score of every candidate for the query"""
+        if not candidates or not query:
+            return np.zeros(len(candidates))
+
+        terms = list(query)
+        docs = [Counter(candidate_text(candidate).split()) for candidate in candidates]
+        tf = np.array([[doc.get(term, 0) for term in terms] for doc in docs], dtype=float)
+        lengths = np.array([sum(doc.values()) for doc in docs], dtype=float)
+        average_length = lengths.mean() or 1.0
+
+        document_frequency = (tf > 0).sum(axis=0)
+        idf = np.log(1 + (len(docs) - document_frequency + 0.5) / (document_frequency + 0.5))
+        saturation = tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * lengths[:, None] / average_length))
+        return saturation @ (idf * np.array([query[term] for term in terms], dtype=float))
+
+
+def rank_candidates(job_description: str, candidates: List[Dict[str, Any]],
+                    job_requirements: Optional[Dict[str, Any]] = None,
+                    method: str = "bm25") -> List[Dict[str, Any]]:
+    """Candidates ordered by lexical relevance to the job, best first"""
+    if method == "heuristic":
+        scorer = HeuristicScorer()
+        matrix, _ = scorer.score_matrix(job_description, candidates, job_requirements)
+        scores = matrix @ scorer.weights
+    elif method == "bm25":
+        ranker = BM25Ranker()
+        scores = ranker.score(ranker.build_query(job_description, job_requirements), candidates)
+    else:
+        raise ValueError(f"Unknown prefilter method: {method}. Available: {', '.join(PREFILTER_METHODS)}")
+
+    order = np.argsort(-np.asarray(scores), kind="stable")
+    return [candidates[i] for i in order]
+
+
+def prefilter_candidates(job_description: str, candidates: List[Dict[str, Any]], keep: int,
+                         job_requirements: Optional[Dict[str, Any]] = None,
+                         method: str = "bm25") -> List[Dict[str, Any]]:
+    """The keep most relevant candidates, best first; everyone when there are no more than keep"""
+    if len(candidates) <= keep:
+        return list(candidates)
+    return rank_candidates(job_description, candidates, job_requirements, method)[:keep]
+
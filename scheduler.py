@@ -0,0 +1,120 @@
+import heapq
+import asyncio
+import itertools
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+
+class PrioritySemaphore:
+    """asyncio semaphore that hands free slots to the lowest priority value first.
+
+    Waiters with equal priority are served in arrival order.
+    """
+
+    def __init__(self, value: int):
+        """Initialize with the given number of slots"""
+        self._value = value
+        self._waiters: List[Tuple[float, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+
+    async def acquire(self, priority: float = 0):
+        """Take a slot, waiting behind any higher-priority waiters"""
+        if self._value > 0 and not self._waiters:
+            self._value -= 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we were cancelled; pass it on
+                self.release()
+            raise
+
+    def release(self):
+        """Return a slot, waking the best waiter if there is one"""
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._value += 1
+
+    async def __aenter__(self):
+        await self.acquire()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
+
+    @asynccontextmanager
+    async def slot(self, priority: float = 0):
+        """Hold a slot for the duration of the block"""
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class BatchScheduler:
+    """Run several sourcing pipelines on one event loop with shared LLM slots.
+
+    Every job's scoring and messaging calls draw from one PrioritySemaphore,
+    and a free slot goes to the job with the most work left (longest
+    processing time first), so no single job is left running a long tail on
+    its own at the end of the batch. Profile fetches go through the agent's
+    shared fetch pool, which fetches a URL surfaced by several jobs once.
+    """
+
+    def __init__(self, agent: Any, max_concurrent_jobs: int, llm_concurrency: int):
+        """Initialize the scheduler for a SourcingAgent"""
+        self.agent = agent
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self.llm_concurrency = llm_concurrency
+
+    def run(self, job_descriptions: List[str], use_cache: bool = True, top_candidates: int = 10) -> List[Dict[str, Any]]:
+        """Run all jobs to completion; results are returned in completion order"""
+        return asyncio.run(self._run_in_new_loop(job_descriptions, use_cache, top_candidates))
+
+    async def _run_in_new_loop(self, job_descriptions: List[str], use_cache: bool,
+                               top_candidates: int) -> List[Dict[str, Any]]:
+        try:
+            return await self.arun(job_descriptions, use_cache, top_candidates)
+        finally:
+            await self.agent.groq_client.aclose()
+
+    async def arun(self, job_descriptions: List[str], use_cache: bool = True, top_candidates: int = 10) -> List[Dict[str, Any]]:
+        """Async version of run"""
+        return [result async for _, result in self.iter_results(job_descriptions, use_cache, top_candidates)]
+
+    async def iter_results(self, job_descriptions: List[str], use_cache: bool = True, top_candidates: int = 10,
+                           scoring_mode: Optional[str] = None) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """Yield (index, result) for each job as soon as it finishes.
+
+        Closing the iterator early stops waiting on the unfinished jobs, but
+        their pipelines keep running: the agent shares each pipeline between
+        identical callers and shields it from any one of them being cancelled,
+        so its result still reaches the cache.
+        """
+        llm_slots = PrioritySemaphore(self.llm_concurrency)
+        job_slots = asyncio.Semaphore(self.max_concurrent_jobs)
+
+        async def run_job(index: int, job_description: str) -> Tuple[int, Dict[str, Any]]:
+            async with job_slots:
+                try:
+                    return index, await self.agent.run_pipeline_async(
+                        job_description, use_cache, top_candidates, llm_slots=llm_slots,
+                        scoring_mode=scoring_mode
+                    )
+                except Exception as e:
+                    return index, {'error': str(e), 'job_description': job_description}
+
+        tasks = [asyncio.ensure_future(run_job(i, jd)) for i, jd in enumerate(job_descriptions)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
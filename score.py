@@ -1,10 +1,28 @@
+import math
 import time
 import asyncio
 import concurrent.futures
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Callable
 import json
+import numpy as np
 from groq_utils import GroqClient
 from config import get_config
+from heuristic_score import HeuristicScorer
+from score_matrix import SCORE_FIELDS, weight_vector
+from scheduler import PrioritySemaphore
+
+# Fields a scoring pass adds to a candidate
+SCREEN_RESULT_FIELDS = ("fit_score", "score_breakdown", "reasoning", "error")
+
+SCORING_GUIDELINES = """Scoring guidelines:
+- education (1-10): Educational background relevance to role
+- career_trajectory (1-10): Career progression and growth
+- company_relevance (1-10): Previous companies' relevance to target role
+- experience_match (1-10): Technical skills and experience alignment
+- location_match (1-10): Geographic compatibility (10 for remote/flexible)
+- tenure (1-10): Job stability and appropriate tenure lengths (not too short, not too long)
+
+Score conservatively. Average candidates should score 5-6, good candidates 7-8, exceptional candidates 9-10."""
 
 class CandidateScorer:
     def __init__(self, groq_client: Optional[GroqClient] = None):
@@ -12,23 +30,27 @@ class CandidateScorer:
         self.groq_client = groq_client or GroqClient()
         self.config = get_config()
         self.scoring_rubric = self.config["scoring_rubric"]
+        self.rubric_weights = weight_vector(self.scoring_rubric, normalize=False)
+        self.heuristic = HeuristicScorer(self.scoring_rubric)
 
     def calculate_weighted_score(self, scores: Dict[str, float]) -> float:
         """Calculate weighted overall score based on rubric"""
-        total_score = 0.0
-        total_weight = 0.0
-
-        for category, weight in self.scoring_rubric.items():
-            if category in scores:
-                total_score += scores[category] * weight
-                total_weight += weight
-
-        return round(total_score / total_weight if total_weight > 0 else 0.0, 1)
-
-    def score_single_candidate(self, job_description: str, candidate: Dict[str, Any]) -> Dict[str, Any]:
-        """Score a single candidate using AI"""
+        # Criteria missing from scores drop out of the weighting
+        weights = self.rubric_weights * np.array([field in scores for field in SCORE_FIELDS])
+        total_weight = weights.sum()
+        values = np.array([float(scores.get(field, 0)) for field in SCORE_FIELDS])
+        return round(float(values @ weights / total_weight) if total_weight > 0 else 0.0, 1)
+
+    def _format_candidate_profile(self, candidate: Dict[str, Any]) -> str:
+        """Render the candidate fields sent to the scoring prompt"""
+        return f"""Name: {candidate.get('name', 'Unknown')}
+LinkedIn: {candidate.get('linkedin_url', candidate.get('url', 'N/A'))}
+Profile Text: {candidate.get('profile_text', 'No profile text available')[:1500]}
+Profile Snippet: {candidate.get('snippet', 'No snippet available')}"""
 
-        messages = [
+    def _build_scoring_messages(self, job_description: str, candidate: Dict[str, Any]) -> List[Dict[str, str]]:
+        """Build the chat messages used to score a single candidate"""
+        return [
             {
                 "role": "system",
                 "content": f"""You are an expert technical recruiter. Score candidates on a scale of 1-10 for each criterion.
@@ -46,15 +68,7 @@ Required JSON structure:
     "reasoning": "Brief explanation of the scores"
 }}
 
-Scoring guidelines:
-- education (1-10): Educational background relevance to role
-- career_trajectory (1-10): Career progression and growth
-- company_relevance (1-10): Previous companies' relevance to target role
-- experience_match (1-10): Technical skills and experience alignment
-- location_match (1-10): Geographic compatibility (10 for remote/flexible)
-- tenure (1-10): Job stability and appropriate tenure lengths (not too short, not too long)
-
-Score conservatively. Average candidates should score 5-6, good candidates 7-8, exceptional candidates 9-10."""
+{SCORING_GUIDELINES}"""
             },
             {
                 "role": "user",
@@ -64,20 +78,36 @@ JOB DESCRIPTION:
 {job_description[:2000]}
 
 CANDIDATE PROFILE:
-Name: {candidate.get('name', 'Unknown')}
-LinkedIn: {candidate.get('linkedin_url', candidate.get('url', 'N/A'))}
-Profile Text: {candidate.get('profile_text', 'No profile text available')[:1500]}
-Profile Snippet: {candidate.get('snippet', 'No snippet available')}
+{self._format_candidate_profile(candidate)}
 
 Provide scores and brief reasoning."""
             }
         ]
 
+    def score_single_candidate(self, job_description: str, candidate: Dict[str, Any],
+                               model: Optional[str] = None) -> Dict[str, Any]:
+        """Score a single candidate using AI"""
+        messages = self._build_scoring_messages(job_description, candidate)
+
+        print(f"[DEBUG] Scoring candidate: {candidate}")
+        response = self.groq_client.make_request(messages, model=model)
+        return self._parse_scoring_response(candidate, response, job_description)
+
+    async def ascore_single_candidate(self, job_description: str, candidate: Dict[str, Any],
+                                      model: Optional[str] = None) -> Dict[str, Any]:
+        """Async version of single candidate scoring"""
+        messages = self._build_scoring_messages(job_description, candidate)
+
         print(f"[DEBUG] Scoring candidate: {candidate}")
-        response = self.groq_client.make_request(messages)
+        response = await self.groq_client.amake_request(messages, model=model)
+        return self._parse_scoring_response(candidate, response, job_description)
+
+    def _parse_scoring_response(self, candidate: Dict[str, Any], response: Optional[str],
+                                job_description: str = "") -> Dict[str, Any]:
+        """Turn a raw scoring response into a scored candidate (or a fallback score)"""
         if not response:
             print(f"No response received for candidate: {candidate.get('name', 'Unknown')}")
-            return self._create_fallback_score(candidate, "API request failed - no response")
+            return self._create_fallback_score(candidate, "API request failed - no response", job_description)
 
         try:
             # Log the raw response
@@ -87,43 +117,297 @@ Provide scores and brief reasoning."""
             print(f"Cleaned response: {cleaned_response}")
             scores = json.loads(cleaned_response)
 
-            # Validate and sanitize scores
-            required_fields = ["education", "career_trajectory", "company_relevance", 
-                             "experience_match", "location_match", "tenure"]
-
-            sanitized_scores = {}
-            for field in required_fields:
-                raw_score = scores.get(field, 5)
-                # Convert to int and clamp between 1-10
-                try:
-                    sanitized_scores[field] = max(1, min(10, int(float(raw_score))))
-                except (ValueError, TypeError):
-                    sanitized_scores[field] = 5
-
-            # Calculate weighted total score
-            total_score = sum(sanitized_scores[criterion] * weight 
-                            for criterion, weight in self.scoring_rubric.items() 
-                            if criterion in sanitized_scores)
-
-            # Propagate all original candidate fields
-            scored_candidate = candidate.copy()
-            scored_candidate.update({
-                "fit_score": round(total_score, 2),
-                "score_breakdown": sanitized_scores,
-                "reasoning": scores.get("reasoning", "No reasoning provided")[:500]  # Limit reasoning length
-            })
-            return scored_candidate
+            return self._build_scored_candidate(candidate, scores)
 
         except json.JSONDecodeError as e:
             print(f"JSON decode error for candidate {candidate.get('name', 'Unknown')}: {e}")
             print(f"Raw response: {response[:200]}...")
-            return self._create_fallback_score(candidate, f"JSON parsing error: {str(e)}")
+            return self._create_fallback_score(candidate, f"JSON parsing error: {str(e)}", job_description)
         except Exception as e:
             print(f"Unexpected error scoring candidate {candidate.get('name', 'Unknown')}: {e}")
-            return self._create_fallback_score(candidate, f"Scoring error: {str(e)}")
+            return self._create_fallback_score(candidate, f"Scoring error: {str(e)}", job_description)
+
+    def _build_scored_candidate(self, candidate: Dict[str, Any], scores: Dict[str, Any]) -> Dict[str, Any]:
+        """Sanitize raw rubric scores and attach them to a copy of the candidate"""
+        sanitized_scores = {}
+        for field in SCORE_FIELDS:
+            raw_score = scores.get(field, 5)
+            # Convert to int and clamp between 1-10
+            try:
+                sanitized_scores[field] = max(1, min(10, int(float(raw_score))))
+            except (ValueError, TypeError):
+                sanitized_scores[field] = 5
+
+        # Calculate weighted total score
+        total_score = float(np.array([sanitized_scores[field] for field in SCORE_FIELDS]) @ self.rubric_weights)
+
+        # Propagate all original candidate fields
+        scored_candidate = candidate.copy()
+        scored_candidate.update({
+            "fit_score": round(total_score, 2),
+            "score_breakdown": sanitized_scores,
+            "reasoning": str(scores.get("reasoning", "No reasoning provided"))[:500]  # Limit reasoning length
+        })
+        return scored_candidate
+
+    def _estimate_tokens(self, text: str) -> int:
+        """Rough token count (~4 characters per token)"""
+        return len(text) // 4 + 1
+
+    def plan_scoring_batches(self, job_description: str, candidates: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Split candidates into groups that fit one packed scoring prompt.
+
+        The group size K adapts to the token budget: the shared prefix (rubric
+        and job description) is paid once per group, and each candidate adds its
+        profile block plus the completion tokens reserved for its breakdown.
+        """
+        if not self.config["scoring_pack_candidates"]:
+            return [[candidate] for candidate in candidates]
+
+        budget = self.config["scoring_batch_token_budget"]
+        max_batch = self.config["scoring_max_batch_size"]
+        output_per_candidate = self.config["scoring_output_tokens_per_candidate"]
+        prefix_tokens = self._estimate_tokens(SCORING_GUIDELINES + job_description[:2000]) + 200
+
+        batches = []
+        current = []
+        used = prefix_tokens
+        for candidate in candidates:
+            cost = self._estimate_tokens(self._format_candidate_profile(candidate)) + output_per_candidate
+            if current and (used + cost > budget or len(current) >= max_batch):
+                batches.append(current)
+                current = []
+                used = prefix_tokens
+            current.append(candidate)
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    def _build_packed_scoring_messages(self, job_description: str, candidates: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """Build one prompt that scores several candidates against the same job"""
+        profiles = "\n\n".join(
+            f"CANDIDATE {i}:\n{self._format_candidate_profile(candidate)}"
+            for i, candidate in enumerate(candidates, 1)
+        )
+        return [
+            {
+                "role": "system",
+                "content": f"""You are an expert technical recruiter. Score each candidate on a scale of 1-10 for each criterion.
+
+IMPORTANT: Return ONLY a valid JSON array with one object per candidate, no explanatory text before or after.
+
+Required JSON structure:
+[
+    {{
+        "id": 1,
+        "education": 8,
+        "career_trajectory": 7,
+        "company_relevance": 6,
+        "experience_match": 9,
+        "location_match": 5,
+        "tenure": 7,
+        "reasoning": "Brief explanation of the scores"
+    }}
+]
+
+"id" must be the candidate number given in the prompt.
+
+{SCORING_GUIDELINES}"""
+            },
+            {
+                "role": "user",
+                "content": f"""Score these {len(candidates)} candidates independently against the job requirements:
+
+JOB DESCRIPTION:
+{job_description[:2000]}
+
+{profiles}
+
+Provide scores and brief reasoning for every candidate."""
+            }
+        ]
+
+    def _parse_packed_scoring_response(self, candidates: List[Dict[str, Any]], response: Optional[str]) -> Dict[int, Dict[str, Any]]:
+        """Parse a packed scoring response into {candidate index: scored candidate}.
+
+        Candidates missing from the array, or with malformed entries, are left
+        out so the caller can rescore them individually.
+        """
+        if not response:
+            return {}
+
+        try:
+            entries = json.loads(self.groq_client.clean_json_array_response(response))
+        except json.JSONDecodeError as e:
+            print(f"Packed scoring JSON decode error: {e}")
+            print(f"Raw response: {response[:200]}...")
+            return {}
+
+        if not isinstance(entries, list):
+            return {}
+
+        scored = {}
+        for position, entry in enumerate(entries, 1):
+            if not isinstance(entry, dict):
+                continue
+            try:
+                index = int(entry.get("id", position)) - 1
+            except (ValueError, TypeError):
+                continue
+            if not 0 <= index < len(candidates) or index in scored:
+                continue
+            if not all(field in entry for field in SCORE_FIELDS):
+                continue
+            scored[index] = self._build_scored_candidate(candidates[index], entry)
+        return scored
+
+    def _packed_max_tokens(self, candidates: List[Dict[str, Any]]) -> int:
+        """Completion budget for a packed scoring request"""
+        return self.config["scoring_output_tokens_per_candidate"] * len(candidates) + 100
+
+    def score_candidate_group(self, job_description: str, candidates: List[Dict[str, Any]],
+                              model: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Score a group of candidates in one LLM call, rescoring unparsed ones individually.
+
+        When the request itself fails (no response after the client's retries)
+        every candidate gets a fallback score instead: individual calls would
+        fail the same way, each with its own retry backoff.
+        """
+        if len(candidates) == 1:
+            return [self.score_single_candidate(job_description, candidates[0], model)]
+
+        response = self.groq_client.make_request(
+            self._build_packed_scoring_messages(job_description, candidates),
+            model=model,
+            max_tokens=self._packed_max_tokens(candidates),
+            clean_json=False
+        )
+        if response is None:
+            return self.fallback_group(candidates, RuntimeError("packed scoring request failed"), job_description)
+        scored = self._parse_packed_scoring_response(candidates, response)
+        if len(scored) < len(candidates):
+            print(f"Packed scoring returned {len(scored)}/{len(candidates)} candidates, scoring the rest individually")
+
+        return [
+            scored[i] if i in scored else self.score_single_candidate(job_description, candidate, model)
+            for i, candidate in enumerate(candidates)
+        ]
+
+    async def ascore_candidate_group(self, job_description: str, candidates: List[Dict[str, Any]],
+                                     model: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Async version of score_candidate_group; unparsed candidates are rescored concurrently"""
+        if len(candidates) == 1:
+            return [await self.ascore_single_candidate(job_description, candidates[0], model)]
+
+        response = await self.groq_client.amake_request(
+            self._build_packed_scoring_messages(job_description, candidates),
+            model=model,
+            max_tokens=self._packed_max_tokens(candidates),
+            clean_json=False
+        )
+        if response is None:
+            return self.fallback_group(candidates, RuntimeError("packed scoring request failed"), job_description)
+        scored = self._parse_packed_scoring_response(candidates, response)
+        missing = [i for i in range(len(candidates)) if i not in scored]
+        if missing:
+            print(f"Packed scoring returned {len(scored)}/{len(candidates)} candidates, scoring the rest individually")
+            rescored = await asyncio.gather(
+                *(self.ascore_single_candidate(job_description, candidates[i], model) for i in missing)
+            )
+            scored.update(zip(missing, rescored))
+        return [scored[i] for i in range(len(candidates))]
+
+    def select_for_rescoring(self, scored_candidates: List[Dict[str, Any]], top_n: int) -> List[Dict[str, Any]]:
+        """Screened candidates worth a second opinion from the large model.
+
+        Picks candidates within the cutoff margin of the Nth best score and
+        those with an ambiguous breakdown (failed screen, or rubric scores
+        spread widely), closest to the cutoff first, up to the rescore cap.
+        """
+        if not scored_candidates:
+            return []
+
+        ranked = self.get_top_candidates(scored_candidates, len(scored_candidates))
+        cutoff = ranked[min(top_n, len(ranked)) - 1].get('fit_score', 0)
+        margin = self.config["cascade_cutoff_margin"]
+
+        def ambiguous(candidate: Dict[str, Any]) -> bool:
+            breakdown = list(candidate.get('score_breakdown', {}).values())
+            spread = max(breakdown) - min(breakdown) if breakdown else 0
+            return candidate.get('error', False) or spread >= self.config["cascade_ambiguous_spread"]
+
+        selected = [
+            candidate for candidate in ranked
+            # The cutoff only matters when some candidates are left out of the top N
+            if (len(ranked) > top_n and abs(candidate.get('fit_score', 0) - cutoff) <= margin) or ambiguous(candidate)
+        ]
+        selected.sort(key=lambda c: abs(c.get('fit_score', 0) - cutoff))
+        limit = max(1, math.ceil(len(ranked) * self.config["cascade_max_rescore_fraction"]))
+        return selected[:limit]
+
+    async def arescore_cascade(self, job_description: str, scored_candidates: List[Dict[str, Any]],
+                               top_n: int, slots: Optional[PrioritySemaphore] = None,
+                               priority: Callable[[], float] = lambda: 0) -> List[Dict[str, Any]]:
+        """Second tier of cascade scoring: re-score the candidates that decide the top N on the large model.
+
+        Rescored candidates keep their small-model result as screen_score; a
+        failed rescore keeps the screening score. slots, if given, is the
+        semaphore bounding concurrent LLM calls, taken at priority().
+        """
+        selected = self.select_for_rescoring(scored_candidates, top_n)
+        if not selected:
+            return scored_candidates
+
+        model = self.config["alternative_model"]
+        print(f"Cascade: re-scoring {len(selected)}/{len(scored_candidates)} candidates with {model}")
+        slots = slots or PrioritySemaphore(self.config["scoring_max_concurrency"])
+
+        async def rescore_group(group: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            async with slots.slot(priority()):
+                try:
+                    return await self.ascore_candidate_group(job_description, group, model=model)
+                except Exception as e:
+                    print(f"Cascade rescoring failed, keeping screening scores: {e}")
+                    return []
+
+        # Rescore from the profile alone, without the screening result attached
+        unscored = [{k: v for k, v in candidate.items() if k not in SCREEN_RESULT_FIELDS} for candidate in selected]
+        groups = self.plan_scoring_batches(job_description, unscored)
+        rescored = {}
+        for results in await asyncio.gather(*(rescore_group(group) for group in groups)):
+            for candidate in results:
+                if not candidate.get('error'):
+                    rescored[candidate.get('linkedin_url', candidate.get('url', ''))] = candidate
+
+        merged = []
+        for candidate in scored_candidates:
+            final = rescored.get(candidate.get('linkedin_url', candidate.get('url', '')))
+            if final is None:
+                merged.append(candidate)
+                continue
+            final = dict(final, screen_score=candidate.get('fit_score', 0), scored_by=model)
+            final.pop('error', None)
+            merged.append(final)
+        return merged
+
+    def _create_fallback_score(self, candidate: Dict[str, Any], error_message: str = "",
+                               job_description: str = "") -> Dict[str, Any]:
+        """Create fallback score when API fails, with error message.
+
+        With the job description at hand the candidate gets the local
+        heuristic score instead of zeros; it stays flagged as an error so it is
+        retried (and rescored by the cascade) rather than treated as final.
+        """
+        if job_description:
+            candidate_result = self.heuristic.score_candidates(job_description, [candidate])[0]
+            candidate_result.update({
+                'reasoning': f'Heuristic fallback score, LLM scoring failed: {error_message}',
+                'error': True
+            })
+            print(f"Heuristic fallback score for {candidate.get('name', 'Unknown')}: {error_message}")
+            return candidate_result
 
-    def _create_fallback_score(self, candidate: Dict[str, Any], error_message: str = "") -> Dict[str, Any]:
-        """Create fallback score when API fails, with error message"""
         candidate_result = candidate.copy()
         candidate_result.update({
             'fit_score': 0.0,
@@ -142,28 +426,71 @@ Provide scores and brief reasoning."""
         return candidate_result
 
     def score_candidates_batch(self, job_description: str, candidates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Score multiple candidates with rate limiting"""
+        """Score multiple candidates concurrently (bounded in-flight requests, paced by the shared rate limiter)"""
         if not candidates:
             return []
 
         print(f"Scoring {len(candidates)} candidates...")
 
         scored_candidates = []
+        groups = self.plan_scoring_batches(job_description, candidates)
+        max_workers = max(1, min(self.config["scoring_max_concurrency"], len(groups)))
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # Candidates are packed into groups sharing one prompt
+            future_to_group = {
+                executor.submit(self.score_candidate_group, job_description, group): group
+                for group in groups
+            }
 
-        # Process candidates sequentially to avoid rate limiting
-        for i, candidate in enumerate(candidates):
-            try:
-                scored_candidate = self.score_single_candidate(job_description, candidate)
-                scored_candidates.append(scored_candidate)
-                print(f"Scored: {scored_candidate.get('name', 'Unknown')} - Score: {scored_candidate.get('fit_score', 0)}")
+            # Collect results as they complete
+            for future in concurrent.futures.as_completed(future_to_group):
+                try:
+                    group_results = future.result()
+                except Exception as e:
+                    group_results = self.fallback_group(future_to_group[future], e, job_description)
+                for scored_candidate in group_results:
+                    scored_candidates.append(scored_candidate)
+                    print(f"Scored: {scored_candidate.get('name', 'Unknown')} - Score: {scored_candidate.get('fit_score', 0)}")
+
+        # Sort by fit score (highest first)
+        scored_candidates.sort(key=lambda x: x.get('fit_score', 0), reverse=True)
+
+        print(f"Completed scoring {len(scored_candidates)} candidates")
+        return scored_candidates
+
+    async def iter_scored_candidates(self, job_description: str, candidates: List[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+        """Score candidates concurrently, yielding each one as soon as its request completes"""
+        semaphore = asyncio.Semaphore(self.config["scoring_max_concurrency"])
 
-                # Add delay between requests to prevent rate limiting
-                if i < len(candidates) - 1:  # Don't sleep after the last candidate
-                    time.sleep(1.5)  # 1.5 second delay between API calls
+        async def score_group(group: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            async with semaphore:
+                try:
+                    return await self.ascore_candidate_group(job_description, group)
+                except Exception as e:
+                    return self.fallback_group(group, e, job_description)
+
+        tasks = [asyncio.create_task(score_group(group))
+                 for group in self.plan_scoring_batches(job_description, candidates)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                for scored_candidate in await next_done:
+                    yield scored_candidate
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def score_candidates_async(self, job_description: str, candidates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Async version of candidate scoring (runs on the event loop, no executor thread)"""
+        if not candidates:
+            return []
+
+        print(f"Scoring {len(candidates)} candidates...")
 
-            except Exception as e:
-                print(f"Failed to score candidate {candidate.get('name', 'Unknown')}: {e}")
-                scored_candidates.append(self._create_fallback_score(candidate, f"Batch scoring error: {str(e)}"))
+        scored_candidates = []
+        async for scored_candidate in self.iter_scored_candidates(job_description, candidates):
+            scored_candidates.append(scored_candidate)
+            print(f"Scored: {scored_candidate.get('name', 'Unknown')} - Score: {scored_candidate.get('fit_score', 0)}")
 
         # Sort by fit score (highest first)
         scored_candidates.sort(key=lambda x: x.get('fit_score', 0), reverse=True)
@@ -171,17 +498,13 @@ Provide scores and brief reasoning."""
         print(f"Completed scoring {len(scored_candidates)} candidates")
         return scored_candidates
 
-    async def score_candidates_async(self, job_description: str, candidates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Async version of candidate scoring"""
-        loop = asyncio.get_event_loop()
-
-        # Run the synchronous scoring in thread pool
-        return await loop.run_in_executor(
-            None, 
-            self.score_candidates_batch, 
-            job_description, 
-            candidates
-        )
+    def fallback_group(self, group: List[Dict[str, Any]], error: Exception,
+                       job_description: str = "") -> List[Dict[str, Any]]:
+        """Fallback scores for every candidate of a group whose request raised or got no response"""
+        for candidate in group:
+            print(f"Failed to score candidate {candidate.get('name', 'Unknown')}: {error}")
+        return [self._create_fallback_score(candidate, f"Batch scoring error: {str(error)}", job_description)
+                for candidate in group]
 
     def get_top_candidates(self, scored_candidates: List[Dict[str, Any]], top_n: int = 10) -> List[Dict[str, Any]]:
         """Get top N candidates by score"""
@@ -204,7 +527,7 @@ Provide scores and brief reasoning."""
 
         scores = [candidate.get('fit_score', 0) for candidate in scored_candidates]
 
-        return {
+        summary = {
             'total_candidates': len(scored_candidates),
             'average_score': round(sum(scores) / len(scores), 1),
             'highest_score': max(scores),
@@ -216,4 +539,11 @@ Provide scores and brief reasoning."""
                 '4-6': len([s for s in scores if 4.0 <= s < 6.0]),
                 '0-4': len([s for s in scores if s < 4.0])
             }
-        }
\ No newline at end of file
+        }
+        rescored = [c for c in scored_candidates if 'screen_score' in c]
+        if rescored:
+            summary['cascade_rescored'] = len(rescored)
+            summary['cascade_average_change'] = round(
+                sum(c['fit_score'] - c['screen_score'] for c in rescored) / len(rescored), 2
+            )
+        return summary
\ No newline at end of file
@@ -0,0 +1,59 @@
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+SCORE_FIELDS = ["education", "career_trajectory", "company_relevance",
+                "experience_match", "location_match", "tenure"]
+
+
+def weight_vector(weights: Dict[str, float], normalize: bool = True) -> np.ndarray:
+    """Rubric weights as a vector in SCORE_FIELDS order, optionally scaled to sum to 1"""
+    unknown = set(weights) - set(SCORE_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown scoring criteria: {', '.join(sorted(unknown))}. "
+                         f"Available: {', '.join(SCORE_FIELDS)}")
+    vector = np.array([float(weights.get(field, 0.0)) for field in SCORE_FIELDS])
+    if (vector < 0).any():
+        raise ValueError("Scoring weights must not be negative")
+    if normalize:
+        total = vector.sum()
+        if total <= 0:
+            raise ValueError("At least one scoring weight must be positive")
+        vector = vector / total
+    return vector
+
+
+class ScoreMatrix:
+    """Rubric breakdowns of scored candidates as a candidates x SCORE_FIELDS matrix.
+
+    Weighted fit scores for any set of rubric weights are one matrix-vector
+    product, so a stored result can be re-ranked under new weights without
+    rescoring anyone.
+    """
+
+    def __init__(self, candidates: List[Dict[str, Any]]):
+        """Build the matrix from candidates carrying a score_breakdown"""
+        self.candidates = candidates
+        self.scores = np.array(
+            [[candidate.get('score_breakdown', {}).get(field, 0) for field in SCORE_FIELDS]
+             for candidate in candidates],
+            dtype=float
+        ).reshape(len(candidates), len(SCORE_FIELDS))
+
+    def __len__(self) -> int:
+        return len(self.candidates)
+
+    def fit_scores(self, weights: Dict[str, float]) -> np.ndarray:
+        """Weighted fit score of every candidate (weights are normalized to sum to 1)"""
+        return self.scores @ weight_vector(weights)
+
+    def rerank(self, weights: Dict[str, float], top_n: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Copies of the best top_n candidates (all by default) with fit_score recomputed under weights"""
+        fit_scores = self.fit_scores(weights)
+        order = np.argsort(-fit_scores, kind="stable")[:top_n]
+        return [
+            dict(self.candidates[i],
+                 fit_score=round(float(fit_scores[i]), 2),
+                 previous_fit_score=self.candidates[i].get('fit_score', 0))
+            for i in order
+        ]
@@ -1,13 +1,117 @@
 import re
+import copy
 import json
 import time
 import hashlib
+import threading
+import concurrent.futures
 import requests
-from typing import List, Dict, Any, Optional
-from urllib.parse import quote_plus, urljoin
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Iterator
+from urllib.parse import quote, quote_plus, unquote, urljoin, urlparse
 from bs4 import BeautifulSoup
 import trafilatura
 from config import get_config
+from cache_store import SQLiteCache
+
+def canonicalize_profile_url(url: str) -> Optional[str]:
+    """Return the canonical form of a LinkedIn profile URL, or None if url is not a profile.
+
+    Country subdomains, scheme, trailing slashes, query strings (trk=...),
+    fragments, case and percent-encoding are normalized away, so
+    ``uk.linkedin.com/in/Jane-Doe/?trk=x`` and ``https://www.linkedin.com/in/jane-doe``
+    map to the same ``https://www.linkedin.com/in/jane-doe``.
+    """
+    if not url:
+        return None
+
+    url = unquote(url.strip())
+    if '://' not in url:
+        url = 'https://' + url.lstrip('/')
+
+    parsed = urlparse(url)
+    host = parsed.netloc.lower().split('@')[-1].split(':')[0]
+    if host != 'linkedin.com' and not host.endswith('.linkedin.com'):
+        return None
+
+    segments = [segment for segment in parsed.path.split('/') if segment]
+    if len(segments) < 2 or segments[0].lower() != 'in':
+        return None
+
+    profile_id = segments[1].strip().lower()
+    if not profile_id:
+        return None
+    return f"https://www.linkedin.com/in/{quote(profile_id, safe='-_.')}"
+
+def profile_url_hash(url: str) -> str:
+    """Stable hash of a profile URL's canonical form (falls back to the raw URL)"""
+    return hashlib.md5((canonicalize_profile_url(url) or url).encode()).hexdigest()
+
+class ProfileURLIndex:
+    """Ordered collection of canonical profile URLs with O(1) hashed duplicate checks"""
+
+    def __init__(self):
+        self.urls = []
+        self._seen = set()
+
+    def add(self, url: str) -> bool:
+        """Add url in canonical form; returns False for non-profiles and duplicates"""
+        canonical = canonicalize_profile_url(url)
+        if canonical is None:
+            return False
+        key = hashlib.md5(canonical.encode()).hexdigest()
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        self.urls.append(canonical)
+        return True
+
+    def __contains__(self, url: str) -> bool:
+        return profile_url_hash(url) in self._seen
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+class HostPolitenessScheduler:
+    """Per-domain politeness for profile fetches.
+
+    At most ``max_per_host`` fetches run against one domain at a time, and
+    consecutive fetch starts on the same domain are spaced at least
+    ``min_interval`` seconds apart. The global concurrency cap is the size of
+    the thread pool that calls into the scheduler.
+    """
+
+    def __init__(self, max_per_host: int, min_interval: float):
+        self.max_per_host = max_per_host
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._semaphores = {}
+        self._next_start = {}
+
+    @staticmethod
+    def host_key(url: str) -> str:
+        """Group subdomains (uk.linkedin.com, www.linkedin.com) under one registered domain"""
+        host = urlparse(url).netloc.lower().split(':')[0]
+        return '.'.join(host.split('.')[-2:]) if host else url
+
+    @contextmanager
+    def slot(self, url: str):
+        """Hold a fetch slot for url's domain, waiting for concurrency and spacing limits"""
+        host = self.host_key(url)
+        with self._lock:
+            semaphore = self._semaphores.setdefault(host, threading.BoundedSemaphore(self.max_per_host))
+
+        semaphore.acquire()
+        try:
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next_start.get(host, 0.0))
+                self._next_start[host] = start + self.min_interval
+            if start > now:
+                time.sleep(start - now)
+            yield
+        finally:
+            semaphore.release()
 
 class LinkedInSearcher:
     def __init__(self):
@@ -17,11 +121,72 @@ class LinkedInSearcher:
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
+
+        # Profile fetch stage: global concurrency cap plus per-domain politeness
+        self.fetch_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.config["fetch_max_concurrency"],
+            thread_name_prefix="profile-fetch"
+        )
+        self.politeness = HostPolitenessScheduler(
+            self.config["fetch_max_per_host"],
+            self.config["fetch_min_host_interval"]
+        )
+        # Fetches in flight by canonical URL, shared by every caller that asks for the same profile
+        self._inflight_fetches: Dict[str, list] = {}
+        self._inflight_lock = threading.Lock()
+
+        # Extracted profile text keyed by canonical profile URL (compressed, TTL + revalidation)
+        self.profile_cache = None
+        if self.config["profile_cache_enabled"]:
+            self.profile_cache = SQLiteCache(
+                self.config["profile_cache_file"],
+                "profiles",
+                ttl_seconds=self.config["profile_cache_ttl_hours"] * 3600,
+                max_entries=self.config["profile_cache_max_entries"],
+                compress=True
+            )
+
+        # Provider results keyed by provider + normalized query
+        self.search_cache = None
+        if self.config["search_cache_enabled"]:
+            self.search_cache = SQLiteCache(
+                self.config["search_cache_file"],
+                "search_results",
+                ttl_seconds=24 * 3600,
+                max_entries=self.config["search_cache_max_entries"]
+            )
     
+    def _normalize_query(self, query: str) -> str:
+        """Normalize a search query so trivially different spellings share a cache entry"""
+        return ' '.join(query.lower().split())
+
+    def _cached_search(self, provider: str, query: str, search_fn) -> List[str]:
+        """Run a provider search through the query-result cache.
+
+        Empty results (including failed requests, which providers report as an
+        empty list) are cached too, with the shorter negative TTL.
+        """
+        if self.search_cache is None:
+            return search_fn(query)
+
+        key = f"{provider}:{self._normalize_query(query)}"
+        cached = self.search_cache.get(key)
+        if cached is not None:
+            print(f"Using cached {provider} results ({len(cached)} URLs)")
+            return cached
+
+        urls = search_fn(query)
+        if urls:
+            ttl = self.config["search_cache_ttl_hours"].get(provider, 24) * 3600
+        else:
+            ttl = self.config["search_cache_negative_ttl_minutes"] * 60
+        self.search_cache.set(key, urls, ttl_seconds=ttl)
+        return urls
+
     def _extract_linkedin_urls(self, html_content: str) -> List[str]:
         """Extract LinkedIn profile URLs from search results HTML"""
         soup = BeautifulSoup(html_content, 'html.parser')
-        urls = []
+        urls = ProfileURLIndex()
         
         # Look for LinkedIn URLs in various link elements
         for link in soup.find_all('a', href=True):
@@ -32,11 +197,10 @@ class LinkedInSearcher:
                     # Google redirect URL
                     href = href.split('/url?q=')[1].split('&')[0]
                 
-                # Ensure it's a proper LinkedIn profile URL
-                if 'linkedin.com/in/' in href and href not in urls:
-                    urls.append(href)
+                # Keep proper LinkedIn profile URLs, deduplicated by canonical form
+                urls.add(href)
         
-        return urls[:self.config["max_candidates"]]
+        return urls.urls[:self.config["max_candidates"]]
     
     def _google_search_fallback(self, query: str) -> List[str]:
         """Fallback Google search using web scraping"""
@@ -68,18 +232,17 @@ class LinkedInSearcher:
             'start': 1
         }
         
-        urls = []
+        urls = ProfileURLIndex()
         try:
-            for start_index in [1, 11]:  # Get up to 20 results
+            # 10 results per page, up to max_candidates (the API serves at most 100)
+            for start_index in range(1, min(self.config["max_candidates"], 100) + 1, 10):
                 params['start'] = start_index
                 response = requests.get(search_url, params=params, timeout=self.config["timeout_seconds"])
                 
                 if response.status_code == 200:
                     data = response.json()
                     for item in data.get('items', []):
-                        link = item.get('link', '')
-                        if 'linkedin.com/in/' in link and link not in urls:
-                            urls.append(link)
+                        urls.add(item.get('link', ''))
                 else:
                     print(f"Google Custom Search API error: {response.status_code}")
                     break
@@ -89,7 +252,7 @@ class LinkedInSearcher:
         except Exception as e:
             print(f"Google Custom Search failed: {e}")
         
-        return urls[:self.config["max_candidates"]]
+        return urls.urls[:self.config["max_candidates"]]
     
     def _serpapi_search(self, query: str) -> List[str]:
         """Use SerpAPI if available"""
@@ -102,21 +265,19 @@ class LinkedInSearcher:
             'api_key': api_key,
             'engine': 'google',
             'q': query,
-            'num': 20
+            'num': self.config["max_candidates"]
         }
         
         try:
             response = requests.get(search_url, params=params, timeout=self.config["timeout_seconds"])
             if response.status_code == 200:
                 data = response.json()
-                urls = []
+                urls = ProfileURLIndex()
                 
                 for result in data.get('organic_results', []):
-                    link = result.get('link', '')
-                    if 'linkedin.com/in/' in link and link not in urls:
-                        urls.append(link)
+                    urls.add(result.get('link', ''))
                 
-                return urls[:self.config["max_candidates"]]
+                return urls.urls[:self.config["max_candidates"]]
             else:
                 print(f"SerpAPI error: {response.status_code}")
                 
@@ -125,32 +286,162 @@ class LinkedInSearcher:
         
         return []
     
+    def _profile_cache_key(self, url: str) -> str:
+        """Cache key for a profile URL: its canonical form"""
+        return canonicalize_profile_url(url) or url
+
+    def _download_profile_text(self, url: str, cached: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Download and extract a profile page, revalidating a cached copy when validators exist.
+
+        Returns {"text", "etag", "last_modified", "not_modified", "status"}; text
+        is None when nothing could be extracted.
+        """
+        headers = {}
+        if cached:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        response = self.session.get(url, headers=headers, timeout=self.config["timeout_seconds"])
+        if response.status_code == 304 and cached:
+            return {'text': cached.get('text'), 'etag': cached.get('etag'),
+                    'last_modified': cached.get('last_modified'), 'not_modified': True,
+                    'status': response.status_code}
+
+        text_content = None
+        if response.status_code == 200 and response.text:
+            text_content = trafilatura.extract(response.text)
+        return {
+            'text': text_content,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'not_modified': False,
+            'status': response.status_code
+        }
+
+    def _get_profile_text(self, url: str) -> Optional[str]:
+        """Return extracted profile text, served from the profile cache when fresh.
+
+        A stale cached copy is served when revalidating it fails.
+        """
+        if self.profile_cache is None:
+            result = self._download_profile_text(url)
+            return result['text']
+
+        key = self._profile_cache_key(url)
+        entry = self.profile_cache.get_entry(key)
+        if entry and not entry['expired']:
+            return entry['value'].get('text')
+
+        cached = entry['value'] if entry else None
+        stale_text = cached.get('text') if cached else None
+        try:
+            result = self._download_profile_text(url, cached)
+        except Exception as e:
+            if stale_text:
+                print(f"Revalidation of {url} failed ({e}), serving the stale cached profile")
+                return stale_text
+            raise
+        if result['not_modified']:
+            self.profile_cache.touch(key)
+        elif result['text']:
+            self.profile_cache.set(key, {
+                'text': result['text'],
+                'etag': result['etag'],
+                'last_modified': result['last_modified'],
+                'fetched_at': time.time()
+            })
+        elif stale_text:
+            print(f"Revalidation of {url} returned no profile (HTTP {result['status']}), serving the stale cached profile")
+            return stale_text
+        return result['text']
+
+    def _configured_providers(self) -> List[tuple]:
+        """(name, search function) for every provider usable with the current configuration"""
+        providers = []
+        if self.config["serpapi_key"]:
+            providers.append(('serpapi', self._serpapi_search))
+        if self.config["google_search_api_key"] and self.config["google_search_engine_id"]:
+            providers.append(('google_cse', self._google_custom_search))
+        providers.append(('google_scrape', self._google_search_fallback))
+        return providers
+
+    def _fan_out_search(self, query: str) -> List[str]:
+        """Query all configured providers concurrently, each bounded by its own deadline"""
+        deadlines = self.config["search_provider_deadlines"]
+        providers = self._configured_providers()
+        # A pool per fan-out with a thread per provider, so every call starts at once and its
+        # deadline is never spent queued behind other pipelines' searches
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=len(providers),
+            thread_name_prefix="search-provider"
+        )
+        start = time.monotonic()
+        future_to_provider = {
+            executor.submit(self._cached_search, name, query, search_fn): name
+            for name, search_fn in providers
+        }
+        executor.shutdown(wait=False)
+
+        results = {}
+        # Wait on the shortest deadlines first so each provider gets its full budget
+        for future, name in sorted(future_to_provider.items(), key=lambda item: deadlines.get(item[1], 30)):
+            remaining = start + deadlines.get(name, 30) - time.monotonic()
+            try:
+                results[name] = future.result(timeout=max(0.0, remaining))
+                print(f"{name}: {len(results[name])} URLs")
+            except concurrent.futures.TimeoutError:
+                # A late provider keeps running in the background and still fills the cache
+                print(f"{name} missed its {deadlines.get(name, 30)}s deadline")
+            except Exception as e:
+                print(f"{name} search failed: {e}")
+
+        return self._merge_provider_results(results)
+
+    def _merge_provider_results(self, results: Dict[str, List[str]]) -> List[str]:
+        """Merge provider URL lists, ranking by how many providers agree and then by best position"""
+        votes = {}
+        best_rank = {}
+        representative = {}
+        for urls in results.values():
+            seen = set()
+            for rank, url in enumerate(urls):
+                key = self.get_profile_hash(url)
+                if key in seen:
+                    continue
+                seen.add(key)
+                votes[key] = votes.get(key, 0) + 1
+                if key not in best_rank or rank < best_rank[key]:
+                    best_rank[key] = rank
+                representative.setdefault(key, url)
+
+        ranked = sorted(votes, key=lambda key: (-votes[key], best_rank[key]))
+        return [representative[key] for key in ranked][:self.config["max_candidates"]]
+
     def _extract_profile_info(self, url: str) -> Dict[str, Any]:
         """Extract basic profile information from LinkedIn URL"""
         try:
-            # Try to get content using trafilatura
-            downloaded = trafilatura.fetch_url(url)
-            if downloaded:
-                text_content = trafilatura.extract(downloaded)
-                if text_content:
-                    # Extract name from URL or content
-                    profile_id = url.split('/in/')[-1].split('/')[0].split('?')[0]
-                    name = profile_id.replace('-', ' ').title()
-                    
-                    # Try to extract more info from text content
-                    lines = text_content.split('\n')[:10]  # First 10 lines usually contain key info
-                    
-                    return {
-                        'url': url,
-                        'name': name,
-                        'profile_text': text_content[:500] + '...' if len(text_content) > 500 else text_content,
-                        'snippet': ' '.join(lines[:3])
-                    }
+            text_content = self._get_profile_text(url)
+            if text_content:
+                # Extract name from URL or content
+                profile_id = unquote(url.split('/in/')[-1].split('/')[0].split('?')[0])
+                name = profile_id.replace('-', ' ').title()
+                
+                # Try to extract more info from text content
+                lines = text_content.split('\n')[:10]  # First 10 lines usually contain key info
+                
+                return {
+                    'url': url,
+                    'name': name,
+                    'profile_text': text_content[:500] + '...' if len(text_content) > 500 else text_content,
+                    'snippet': ' '.join(lines[:3])
+                }
         except Exception as e:
             print(f"Failed to extract profile info from {url}: {e}")
         
         # Fallback with minimal info
-        profile_id = url.split('/in/')[-1].split('/')[0].split('?')[0]
+        profile_id = unquote(url.split('/in/')[-1].split('/')[0].split('?')[0])
         name = profile_id.replace('-', ' ').title()
         
         return {
@@ -162,6 +453,13 @@ class LinkedInSearcher:
     
     def search_candidates(self, job_description: str, job_requirements: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """Search for LinkedIn candidates based on job description"""
+        urls = self.find_profile_urls(job_description, job_requirements)
+        candidates = self.fetch_profiles(urls)
+        print(f"Successfully processed {len(candidates)} candidate profiles")
+        return candidates
+
+    def find_profile_urls(self, job_description: str, job_requirements: Optional[Dict[str, Any]] = None) -> List[str]:
+        """Run the search stage only, returning canonical profile URLs"""
         # Build search query
         query_parts = ['site:linkedin.com/in']
         
@@ -201,46 +499,106 @@ class LinkedInSearcher:
         search_query = ' '.join(query_parts)
         print(f"Searching with query: {search_query}")
         urls = []
-        # 1. Try SerpAPI first
-        if self.config["serpapi_key"]:
-            print("Trying SerpAPI...")
-            urls = self._serpapi_search(search_query)
-        # 2. Try Google Custom Search API
-        if not urls and self.config["google_search_api_key"]:
-            print("Trying Google Custom Search API...")
-            urls = self._google_custom_search(search_query)
-        # 3. Fallback to web scraping
-        if not urls:
-            print("Using fallback search method...")
-            urls = self._google_search_fallback(search_query)
+        if self.config["search_fan_out"]:
+            # Query every configured provider at once and merge the results
+            urls = self._fan_out_search(search_query)
+        else:
+            # 1. Try SerpAPI first
+            if self.config["serpapi_key"]:
+                print("Trying SerpAPI...")
+                urls = self._cached_search('serpapi', search_query, self._serpapi_search)
+            # 2. Try Google Custom Search API
+            if not urls and self.config["google_search_api_key"]:
+                print("Trying Google Custom Search API...")
+                urls = self._cached_search('google_cse', search_query, self._google_custom_search)
+            # 3. Fallback to web scraping
+            if not urls:
+                print("Using fallback search method...")
+                urls = self._cached_search('google_scrape', search_query, self._google_search_fallback)
         # 4. If still no results, try a very general query
         if not urls:
             general_query = 'site:linkedin.com/in "software engineer" "machine learning"'
             print(f"Trying general query: {general_query}")
-            urls = self._google_search_fallback(general_query)
+            urls = self._cached_search('google_scrape', general_query, self._google_search_fallback)
         print(f"Found {len(urls)} LinkedIn profile URLs")
-        candidates = []
+        return urls
+
+    def _build_candidate(self, profile_info: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert extracted profile info into the candidate record used downstream"""
+        # Add headline if possible (from snippet or profile_text)
+        headline = profile_info.get('snippet', '')
+        return {
+            'name': profile_info.get('name', ''),
+            'linkedin_url': profile_info.get('url', ''),
+            'headline': headline,
+            'profile_text': profile_info.get('profile_text', ''),
+            'snippet': headline
+        }
+
+    def _fetch_candidate(self, url: str) -> Dict[str, Any]:
+        """Fetch and extract one profile inside its domain's politeness slot"""
+        with self.politeness.slot(url):
+            profile_info = self._extract_profile_info(url)
+        candidate = self._build_candidate(profile_info)
+        print(f"[DEBUG] Extracted candidate: {candidate}")
+        return candidate
+
+    def _acquire_fetch(self, url: str) -> concurrent.futures.Future:
+        """Submit a profile fetch, or join the one already in flight for the same profile"""
+        key = canonicalize_profile_url(url) or url
+        with self._inflight_lock:
+            entry = self._inflight_fetches.get(key)
+            if entry is None:
+                entry = self._inflight_fetches[key] = [self.fetch_executor.submit(self._fetch_candidate, url), 0]
+            entry[1] += 1
+            return entry[0]
+
+    def _release_fetch(self, url: str, future: concurrent.futures.Future):
+        """Drop one caller's interest in a fetch, cancelling it if nobody else is waiting.
+
+        The last caller removes the entry itself rather than through a done
+        callback: callbacks run inline on a finished or cancelled future, and
+        would then take the lock this method holds.
+        """
+        key = canonicalize_profile_url(url) or url
+        with self._inflight_lock:
+            entry = self._inflight_fetches.get(key)
+            if entry is None or entry[0] is not future:
+                return
+            entry[1] -= 1
+            if entry[1] > 0:
+                return
+            del self._inflight_fetches[key]
+        future.cancel()
+
+    def iter_profiles(self, urls: List[str]) -> Iterator[Dict[str, Any]]:
+        """Fetch profiles concurrently, yielding each candidate as soon as it is extracted.
+
+        Variants of one profile URL are fetched once. A profile already being
+        fetched for another caller is fetched once and shared.
+        """
+        # One acquire per profile, so every acquire is matched by exactly one release
+        unique_urls = {}
         for url in urls:
-            try:
-                profile_info = self._extract_profile_info(url)
-                # Add headline if possible (from snippet or profile_text)
-                headline = profile_info.get('snippet', '')
-                candidate = {
-                    'name': profile_info.get('name', ''),
-                    'linkedin_url': profile_info.get('url', ''),
-                    'headline': headline,
-                    'profile_text': profile_info.get('profile_text', ''),
-                    'snippet': headline
-                }
-                print(f"[DEBUG] Extracted candidate: {candidate}")
-                candidates.append(candidate)
-                time.sleep(0.5)
-            except Exception as e:
-                print(f"Failed to process profile {url}: {e}")
-                continue
-        print(f"Successfully processed {len(candidates)} candidate profiles")
-        return candidates
-    
+            unique_urls.setdefault(self._profile_cache_key(url), url)
+        future_to_url = {self._acquire_fetch(url): url for url in unique_urls.values()}
+        try:
+            for future in concurrent.futures.as_completed(future_to_url):
+                try:
+                    # Callers sharing a fetch each get their own copy of the candidate
+                    yield copy.deepcopy(future.result())
+                except Exception as e:
+                    print(f"Failed to process profile {future_to_url[future]}: {e}")
+        finally:
+            for future, url in future_to_url.items():
+                self._release_fetch(url, future)
+
+    def fetch_profiles(self, urls: List[str]) -> List[Dict[str, Any]]:
+        """Fetch profiles concurrently, returning one candidate per profile in search-result order"""
+        fetched = {self._profile_cache_key(candidate['linkedin_url']): candidate
+                   for candidate in self.iter_profiles(urls)}
+        return [fetched.pop(key) for key in map(self._profile_cache_key, urls) if key in fetched]
+
     def get_profile_hash(self, url: str) -> str:
-        """Generate hash for profile URL to avoid duplicates"""
-        return hashlib.md5(url.encode()).hexdigest()
+        """Generate hash for profile URL to avoid duplicates (variants of one profile share a hash)"""
+        return profile_url_hash(url)
@@ -0,0 +1,54 @@
+import copy
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """Coalesce concurrent identical async calls into one execution.
+
+    The first caller for a key starts the work; callers arriving while it is
+    in flight await the same task. Every caller gets its own deep copy of the
+    result, and a caller being cancelled does not cancel the shared work.
+    """
+
+    def __init__(self):
+        """Initialize with no calls in flight"""
+        self._calls: Dict[Tuple[int, Hashable], asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self.started = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn() for key, or join the call already in flight on this event loop"""
+        # Tasks belong to a loop, so calls only coalesce within the same loop
+        call_key = (id(asyncio.get_running_loop()), key)
+        with self._lock:
+            task = self._calls.get(call_key)
+            if task is None:
+                task = asyncio.ensure_future(fn())
+                self._calls[call_key] = task
+                task.add_done_callback(lambda done: self._forget(call_key, done))
+                self.started += 1
+            else:
+                self.coalesced += 1
+
+        result = await asyncio.shield(task)
+        return copy.deepcopy(result)
+
+    def _forget(self, call_key: Tuple[int, Hashable], task: asyncio.Task):
+        with self._lock:
+            if self._calls.get(call_key) is task:
+                del self._calls[call_key]
+        if not task.cancelled():
+            # Retrieve the exception so an unobserved failure is not logged as never retrieved
+            task.exception()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Calls started, calls that joined an in-flight one, and calls in flight"""
+        with self._lock:
+            return {
+                "started": self.started,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls)
+            }
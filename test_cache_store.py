@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Regression tests for SQLiteCache size accounting and LRU eviction
+"""
+
+import os
+import time
+
+from cache_store import SQLiteCache
+
+
+def make_cache(tmp_path, **caps):
+    return SQLiteCache(os.path.join(tmp_path, "cache.db"), "entries", ttl_seconds=3600, **caps)
+
+
+def table_totals(cache):
+    return cache._connect().execute(
+        f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {cache.table}"
+    ).fetchone()
+
+
+def test_running_totals_track_writes(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.set("a", "x" * 100)
+    cache.set("b", "y" * 10)
+    cache.set("a", "z")  # replace with a smaller value
+    cache.delete("b")
+    cache.delete("missing")
+    stats = cache.get_stats()
+    assert (stats["entries"], stats["size_bytes"]) == table_totals(cache)
+
+    cache.clear()
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_totals_are_loaded_when_reopened(tmp_path):
+    cache = make_cache(tmp_path)
+    for i in range(5):
+        cache.set(f"key-{i}", i)
+    reopened = make_cache(tmp_path)
+    assert reopened.get_stats()["entries"] == 5
+
+
+def test_evicts_least_recently_used_over_entry_cap(tmp_path):
+    cache = make_cache(tmp_path, max_entries=10)
+    for i in range(10):
+        cache.set(f"key-{i}", i)
+        time.sleep(0.001)
+    cache.get("key-0")  # key-0 is now the most recently used
+    cache.set("key-10", 10)
+
+    assert table_totals(cache)[0] <= 10
+    assert cache.get("key-0") == 0
+    assert cache.get("key-1") is None
+    assert cache.get_stats()["evictions"] >= 1
+
+
+def test_evicts_over_byte_cap(tmp_path):
+    cache = make_cache(tmp_path, max_bytes=1000)
+    for i in range(20):
+        cache.set(f"key-{i}", "x" * 100)
+    count, total_bytes = table_totals(cache)
+    assert total_bytes <= 1000
+    assert cache.get_stats()["size_bytes"] == total_bytes
+
+
+def test_writes_under_the_caps_do_not_scan_the_table(tmp_path):
+    cache = make_cache(tmp_path, max_entries=1000, max_bytes=10 ** 6)
+    statements = []
+    cache._connect().set_trace_callback(statements.append)
+    for i in range(20):
+        cache.set(f"key-{i}", i)
+    assert not [sql for sql in statements if "COUNT(*)" in sql or "SUM(size)" in sql]
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Regression tests for GroqClient rate-limiter reservations (no network access needed)
+"""
+
+import asyncio
+
+import pytest
+
+import groq_utils
+from groq_utils import GroqClient, RateLimiter
+
+MODEL = "test-model"
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._body = body or {}
+        self.text = str(self._body)
+
+    def json(self):
+        return self._body
+
+
+def ok(content="done"):
+    return FakeResponse(200, {"choices": [{"message": {"content": content}}]})
+
+
+def make_client(replies):
+    """GroqClient whose transports replay replies (responses, or exceptions to raise)"""
+    client = GroqClient.__new__(GroqClient)
+    client.base_url = "https://groq.invalid"
+    client.model = client.alternative_model = MODEL
+    client.timeout = 1
+    client.max_retries = 3
+    client.response_cache = None
+    replies = list(replies)
+
+    def post(url, json=None, timeout=None):
+        reply = replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    class Session:
+        pass
+
+    class AsyncClient:
+        async def post(self, url, json=None):
+            return post(url, json)
+
+    client.session = Session()
+    client.session.post = post
+    client._get_async_client = lambda: AsyncClient()
+    return client
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    limiter = RateLimiter(requests_per_minute=30, tokens_per_minute=100000)
+    monkeypatch.setitem(groq_utils._rate_limiters, MODEL, limiter)
+    monkeypatch.setattr(groq_utils.time, "sleep", lambda seconds: None)
+    return limiter
+
+
+def test_attempt_without_response_is_refunded(limiter):
+    client = make_client([ConnectionError("refused"), ok()])
+    assert client.make_request(MESSAGES, clean_json=False) == "done"
+    # Only the successful attempt keeps its reservation
+    assert limiter.get_stats()["available_requests"] == pytest.approx(29, abs=0.1)
+
+
+def test_error_response_is_not_refunded(limiter):
+    client = make_client([FakeResponse(500), ok()])
+    assert client.make_request(MESSAGES, clean_json=False) == "done"
+    # Groq counted the 500, so both attempts stay charged
+    assert limiter.get_stats()["available_requests"] == pytest.approx(28, abs=0.1)
+
+
+def test_rate_limited_response_trusts_headers(limiter):
+    headers = {"x-ratelimit-remaining-requests": "5", "retry-after": "0"}
+    client = make_client([FakeResponse(429, headers=headers), ok()])
+    assert client.make_request(MESSAGES, clean_json=False) == "done"
+    # The bucket follows the 429's headers (5 left) minus the retry, with no refund on top
+    assert limiter.get_stats()["available_requests"] == pytest.approx(4, abs=0.1)
+
+
+def test_async_path_refunds_the_same_way(limiter, monkeypatch):
+    async def no_sleep(seconds):
+        pass
+
+    monkeypatch.setattr(groq_utils.asyncio, "sleep", no_sleep)
+    client = make_client([ConnectionError("refused"), FakeResponse(503), ok()])
+    assert asyncio.run(client.amake_request(MESSAGES, clean_json=False)) == "done"
+    assert limiter.get_stats()["available_requests"] == pytest.approx(28, abs=0.1)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Tests for BatchScheduler result streaming (no network access needed)
+"""
+
+import asyncio
+
+from scheduler import BatchScheduler
+from singleflight import SingleFlight
+
+
+class FakeAgent:
+    """run_pipeline_async sleeps for the delay named in the job description, shared like the real agent"""
+
+    def __init__(self):
+        self.in_flight = SingleFlight()
+        self.finished = []
+        self.modes = []
+
+    async def run_pipeline_async(self, job_description, use_cache=True, top_candidates=10,
+                                 llm_slots=None, scoring_mode=None):
+        self.modes.append(scoring_mode)
+        return await self.in_flight.do(job_description, lambda: self._run(job_description))
+
+    async def _run(self, job_description):
+        delay = float(job_description)
+        if delay < 0:
+            raise RuntimeError("pipeline failed")
+        await asyncio.sleep(delay)
+        self.finished.append(job_description)
+        return {'job_description': job_description}
+
+
+def test_results_stream_in_completion_order_with_their_index():
+    agent = FakeAgent()
+    scheduler = BatchScheduler(agent, max_concurrent_jobs=3, llm_concurrency=2)
+
+    async def collect():
+        return [item async for item in scheduler.iter_results(["0.03", "0.01", "-1"], scoring_mode="fast")]
+
+    results = asyncio.run(collect())
+    assert [index for index, _ in results] == [2, 1, 0]
+    assert results[0][1] == {'error': 'pipeline failed', 'job_description': '-1'}
+    assert agent.modes == ["fast"] * 3
+
+
+def test_closing_early_leaves_shared_pipelines_running():
+    agent = FakeAgent()
+    scheduler = BatchScheduler(agent, max_concurrent_jobs=2, llm_concurrency=2)
+
+    async def take_first():
+        results = scheduler.iter_results(["0.01", "0.05"])
+        first = await results.__anext__()
+        await results.aclose()
+        await asyncio.sleep(0.1)
+        return first
+
+    assert asyncio.run(take_first()) == (0, {'job_description': '0.01'})
+    # The slower job lost its waiter but its pipeline still finished
+    assert agent.finished == ["0.01", "0.05"]
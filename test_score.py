@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Regression tests for packed (multi-candidate) scoring fallbacks (no network access needed)
+"""
+
+import asyncio
+import json
+
+from score import CandidateScorer, SCORE_FIELDS
+
+SCORES = {field: 7 for field in SCORE_FIELDS}
+JOB = "Machine learning engineer with Python and PyTorch"
+
+
+class FakeGroq:
+    """Answers packed requests with packed_response and single requests with a valid score"""
+
+    def __init__(self, packed_response):
+        self.packed_response = packed_response
+        self.packed_calls = 0
+        self.single_calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def clean_json_response(self, response):
+        return response
+
+    def clean_json_array_response(self, response):
+        return response
+
+    def _answer(self, max_tokens):
+        if max_tokens is not None:
+            self.packed_calls += 1
+            return self.packed_response
+        self.single_calls += 1
+        return json.dumps(dict(SCORES, reasoning="individual"))
+
+    def make_request(self, messages, model=None, max_tokens=None, clean_json=True):
+        return self._answer(max_tokens)
+
+    async def amake_request(self, messages, model=None, max_tokens=None, clean_json=True):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return self._answer(max_tokens)
+
+
+def candidates(count):
+    return [{"name": f"Candidate {i}", "linkedin_url": f"https://www.linkedin.com/in/c{i}",
+             "profile_text": "Python PyTorch engineer"} for i in range(count)]
+
+
+def test_failed_packed_request_falls_back_without_individual_calls():
+    groq = FakeGroq(packed_response=None)
+    scorer = CandidateScorer(groq)
+    results = scorer.score_candidate_group(JOB, candidates(4))
+    assert len(results) == 4
+    assert all(result.get("error") for result in results)
+    assert (groq.packed_calls, groq.single_calls) == (1, 0)
+
+
+def test_async_failed_packed_request_falls_back_without_individual_calls():
+    groq = FakeGroq(packed_response=None)
+    scorer = CandidateScorer(groq)
+    results = asyncio.run(scorer.ascore_candidate_group(JOB, candidates(4)))
+    assert all(result.get("error") for result in results)
+    assert (groq.packed_calls, groq.single_calls) == (1, 0)
+
+
+def test_candidates_missing_from_parsed_response_are_rescored_concurrently():
+    # The packed answer parses but only covers the first candidate
+    groq = FakeGroq(packed_response=json.dumps([dict(SCORES, id=1, reasoning="packed")]))
+    scorer = CandidateScorer(groq)
+    group = candidates(4)
+    results = asyncio.run(scorer.ascore_candidate_group(JOB, group))
+
+    assert [result["name"] for result in results] == [candidate["name"] for candidate in group]
+    assert results[0]["reasoning"] == "packed"
+    assert all(result["reasoning"] == "individual" for result in results[1:])
+    assert (groq.packed_calls, groq.single_calls) == (1, 3)
+    assert groq.max_in_flight == 3
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests for shared in-flight profile fetches (no network access needed)
+"""
+
+import threading
+import concurrent.futures
+
+from search import LinkedInSearcher
+
+
+def make_searcher(release=None):
+    """LinkedInSearcher whose fetches return at once, or wait for the release event"""
+    searcher = LinkedInSearcher.__new__(LinkedInSearcher)
+    searcher.fetch_executor = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+    searcher._inflight_fetches = {}
+    searcher._inflight_lock = threading.Lock()
+    searcher.fetched = []
+
+    def fetch(url):
+        searcher.fetched.append(url)
+        if release is not None:
+            release.wait(5)
+        return {'name': url, 'linkedin_url': url}
+
+    searcher._fetch_candidate = fetch
+    return searcher
+
+
+def run_with_timeout(fn):
+    """Run fn on a daemon thread, failing instead of hanging if it deadlocks"""
+    outcome = {}
+    thread = threading.Thread(target=lambda: outcome.setdefault('result', fn()), daemon=True)
+    thread.start()
+    thread.join(5)
+    assert not thread.is_alive(), "deadlocked"
+    return outcome['result']
+
+
+def test_finished_fetches_are_released_without_deadlock():
+    searcher = make_searcher()
+    urls = ["https://www.linkedin.com/in/a", "https://uk.linkedin.com/in/A/?trk=x", "https://www.linkedin.com/in/b"]
+    profiles = run_with_timeout(lambda: searcher.fetch_profiles(urls))
+    assert [profile['name'] for profile in profiles] == [urls[0], urls[2]]
+    assert searcher._inflight_fetches == {}
+
+
+def test_closing_generator_early_cancels_unshared_fetches():
+    release = threading.Event()
+    searcher = make_searcher(release)
+    searcher.fetch_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    urls = [f"https://www.linkedin.com/in/p{i}" for i in range(3)]
+
+    def take_one_and_close():
+        profiles = searcher.iter_profiles(urls)
+        release.set()
+        first = next(profiles)
+        profiles.close()
+        return first
+
+    run_with_timeout(take_one_and_close)
+    searcher.fetch_executor.shutdown(wait=True)
+    assert searcher._inflight_fetches == {}
+    # Fetches still queued when the generator closed never ran
+    assert len(searcher.fetched) < len(urls)
+
+
+def test_concurrent_callers_share_one_fetch():
+    release = threading.Event()
+    searcher = make_searcher(release)
+    url = "https://www.linkedin.com/in/shared"
+    first = searcher._acquire_fetch(url)
+    second = searcher._acquire_fetch("https://de.linkedin.com/in/shared/")
+    assert first is second
+
+    searcher._release_fetch(url, first)
+    assert not first.cancelled()
+    release.set()
+    assert first.result(5)['name'] == url
+    run_with_timeout(lambda: searcher._release_fetch(url, second))
+    assert searcher._inflight_fetches == {}
+    assert searcher.fetched == [url]